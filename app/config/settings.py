@@ -1,4 +1,5 @@
 from pydantic_settings import BaseSettings, SettingsConfigDict
+from functools import lru_cache
 from typing import Dict
 import os
 
@@ -6,7 +7,8 @@ class Settings(BaseSettings):
     model_config = SettingsConfigDict(
         env_file=".env",
         env_file_encoding="utf-8",
-        extra="ignore"
+        extra="ignore",
+        frozen=True # Settings are read-only once loaded
     )
 
     LOG_LEVEL: str = "INFO"
@@ -16,6 +18,8 @@ class Settings(BaseSettings):
     REDIS_PORT: int = 6379
     REDIS_PASSWORD: str = ""
     REDIS_DB_MAIN: int = 15
+    REDIS_MAX_CONNECTIONS: int = 64
+    REDIS_POOL_TIMEOUT: float = 5.0 # Seconds waiting for a free connection of the pool
 
     # --- INPUT SOURCES CONFIG ---
     WORKERS_INPUT_SOURCE: Dict[str, Dict[str, str]] = {
@@ -26,6 +30,13 @@ class Settings(BaseSettings):
     MT02_API_BASE_URL: str = "..."
     MT02_API_KEY: str = "..."
     MT02_WORKER_SLEEP_SECONDS: int = 300
+    MT02_WORKER_SLEEP_JITTER: float = 0.25 # Fraction of the sleep added randomly, so the requests don't synchronize
+    MT02_WORKER_MAX_ERROR_BACKOFF_SECONDS: int = 3600 # Max sleep after consecutive errors, the sleep starts at the normal one and doubles on each error
+    MT02_API_MAX_CONCURRENCY: int = 32 # Max of simultaneous requests to the MT02 API
+    MT02_PAGE_SIZE: int = 500 # Devices per page requested to the MT02 API, so most fleets fit in a single page
+    MT02_WORKER_PARALLELISM: int = 16 # Max of locations being processed at the same time
+    MT02_WORKER_MAX_PENDING: int = 32 # Max of locations waiting to be processed before the worker blocks
+    MT02_STATE_CACHE_TTL_SECONDS: int = 900 # Time the devices state stays cached in memory, in front of redis
 
     # --- OUTPUT PROTOCOLS CONFIG ---
     # GENERAL
@@ -35,8 +46,32 @@ class Settings(BaseSettings):
     }
     
     DEFAULT_OUTPUT_PROTOCOL: str = "gt06"
+    MAX_OUTPUT_SESSIONS: int = 50000 # Max of sessions with the main servers, the least recently used ones are closed beyond it
+    OUTPUT_PROTOCOL_CACHE_TTL_SECONDS: int = 60 # Time the output protocol of a device stays cached in memory, in front of redis
+
+    # Sockets of the connections to the main servers
+    OUTPUT_SOCKET_TIMEOUT_SECONDS: float = 5.0 # Max time to connect or to send a packet, a dead main server does not hang the senders
+    OUTPUT_RECONNECT_BACKOFF_SECONDS: float = 0.1 # Time without new connection attempts after a failure, doubled on each consecutive failure
+    OUTPUT_RECONNECT_MAX_BACKOFF_SECONDS: float = 30.0 # Max time without new connection attempts after failures
+    OUTPUT_HEARTBEAT_INTERVAL_SECONDS: float = 30.0 # Time without sending data after which a heartbeat is sent
+    OUTPUT_HEARTBEAT_MAX_CONCURRENCY: int = 8 # Max of heartbeats being sent at the same time
+    OUTPUT_COMMAND_MAX_CONCURRENCY: int = 8 # Max of commands of the main servers (and disconnections) being processed at the same time, out of the listener thread
+    OUTPUT_TCP_NODELAY: bool = True # Disables Nagle, the packets are small and must not wait each other
+    OUTPUT_TCP_KEEPALIVE_IDLE_SECONDS: int = 60 # Idle time before the keepalive probes that detect dead connections, 0 disables them
+    OUTPUT_TCP_USER_TIMEOUT_SECONDS: int = 30 # Max time sent data may stay unacknowledged before the connection is dropped (linux), 0 disables it
+    OUTPUT_SOCKET_SEND_BUFFER_SIZE: int = 0 # Size of the send buffer of the kernel (SO_SNDBUF), 0 keeps the system default
+    OUTPUT_SOCKET_RECEIVE_BUFFER_SIZE: int = 0 # Size of the receive buffer of the kernel (SO_RCVBUF), 0 keeps the system default
     
     # GT06
     GT06_LOCATION_PACKET_PROTOCOL_NUMBER: int = 0xA0 # Can be: 0x22, 0x32, 0xA0. For more informations consult the protocol guide.
+    GT06_VOLTAGE_CACHE_TTL_SECONDS: int = 30 # Time the voltage of a device stays cached in its session, in front of redis
+    GT06_LOGIN_TIMEOUT_SECONDS: float = 10.0 # Max time the packets wait the main server to answer the login before reconnecting
+
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """
+    Returns the settings of the application, loaded only once.
+    """
+    return Settings()
 
-settings = Settings()
\ No newline at end of file
+settings = get_settings()
\ No newline at end of file
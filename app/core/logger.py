@@ -5,7 +5,16 @@ from app.config.settings import settings
 # Removes the old handler to avoid duplicates
 logger.remove()
 
+# Default label of the messages, the format needs one. The threads that don't inherit a contextualize
+# (the pools of the workers, the listener and the heartbeat scheduler) log under it instead of failing the format
+logger.configure(extra={"log_label": "SERVER"})
+
+# The extended tracebacks walk the whole stack and the variables values on every exception logged,
+# so they are only enabled when debugging
+is_debug = settings.LOG_LEVEL.upper() == "DEBUG"
+
 # Adds a new "sink" to stdout with a more rich and colorful format
+# The format is kept as a string because loguru compiles it only once (a function format is parsed on every message)
 logger.add(
     sys.stdout,
     level=settings.LOG_LEVEL.upper(),
@@ -14,8 +23,8 @@ logger.add(
            "<yellow>[{extra[log_label]}]</yellow> |"
            "<cyan>{name}:{function}:{line}</cyan> - <level>{message}</level>",
     colorize=True,
-    backtrace=True,
-    diagnose=True
+    backtrace=is_debug,
+    diagnose=is_debug
 )
 
 def get_logger(name: str):
@@ -1,24 +1,38 @@
-
+import os
 import redis
+from redis.connection import BlockingConnectionPool
 
 from app.core.logger import get_logger
 from app.config.settings import settings
-from functools import lru_cache
+from functools import cache
 
 logger = get_logger(__name__)
 
-@lru_cache(maxsize=1)
-def get_redis(db: int | None = None, host: str | None = None, port: int | None = None, password: str | None = None, decode_responses: bool = True):
+# The connection is configured only by the settings, there are no arguments,
+# so each function below is a true singleton and its cache never grows or evicts.
+
+def _create_redis(decode_responses: bool):
     redis_conn = None
 
-    db = db if db is not None else settings.REDIS_DB_MAIN
-    host = host if host is not None else settings.REDIS_HOST
-    port = port if port is not None else settings.REDIS_PORT
-    password = password if password is not None else settings.REDIS_PASSWORD
-    logger.info(f"Connecting to Redis DB {db} at {host}:{port} with ConnectionPool", log_label="SERVIDOR")
+    db = settings.REDIS_DB_MAIN
+    host = settings.REDIS_HOST
+    port = settings.REDIS_PORT
+    password = settings.REDIS_PASSWORD
+    logger.info(f"Connecting to Redis DB {db} at {host}:{port} with BlockingConnectionPool (decode_responses={decode_responses})", log_label="SERVIDOR")
 
     try:
-        connection_pool = redis.ConnectionPool(max_connections=20, db=db, host=host, port=port, password=password, decode_responses=decode_responses)
+        # Blocking pool, so under burst the callers wait for a free connection instead of failing
+        connection_pool = BlockingConnectionPool(
+            max_connections=settings.REDIS_MAX_CONNECTIONS,
+            timeout=settings.REDIS_POOL_TIMEOUT,
+            db=db,
+            host=host,
+            port=port,
+            password=password,
+            decode_responses=decode_responses,
+            socket_keepalive=True,
+            health_check_interval=30,
+        )
         redis_conn = redis.Redis(connection_pool=connection_pool)
         redis_conn.ping()
         logger.info(f"Successfully connected to Redis DB {db} at {host}:{port}", log_label="SERVIDOR")
@@ -26,4 +40,26 @@ def get_redis(db: int | None = None, host: str | None = None, port: int | None =
         logger.error(f"Failed to connect to Redis DB {db} at {host}:{port}; {e}", log_label="SERVIDOR")
         exit(1)
 
-    return redis_conn
\ No newline at end of file
+    return redis_conn
+
+@cache
+def get_redis_str() -> redis.Redis:
+    """
+    Returns the redis client that decodes the responses to str.
+    """
+    return _create_redis(decode_responses=True)
+
+@cache
+def get_redis_bytes() -> redis.Redis:
+    """
+    Returns the redis client that keeps the responses as bytes, for the hot paths that don't need str.
+    """
+    return _create_redis(decode_responses=False)
+
+def _clear_clients():
+    get_redis_str.cache_clear()
+    get_redis_bytes.cache_clear()
+
+# Connections cannot be shared between processes safely,
+# so a forked child rebuilds its own pools on the first use
+os.register_at_fork(after_in_child=_clear_clients)
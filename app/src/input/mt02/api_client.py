@@ -1,5 +1,10 @@
+import orjson
 import requests
 import time
+from types import MappingProxyType
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 from app.core.logger import get_logger
 from app.config.settings import settings
@@ -16,64 +21,141 @@ class MT02ApiClient:
             raise ValueError("API key must be provided")
         
         self.api_key = api_key
+
+        # A single session for the whole life of the client, so HTTP keep-alive
+        # reuses the same TCP+TLS connection between requests instead of opening a new one every call.
+        self._session = requests.Session()
+
+        # Connection pool and retries for transient errors of the API
+        adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=settings.MT02_API_MAX_CONCURRENCY,
+            max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=[429, 500, 502, 503, 504]),
+        )
+        self._session.mount("https://", adapter)
+        self._session.mount("http://", adapter)
+
+        # The static headers are built only once, and set in the session
+        self._static_headers = MappingProxyType({
+            "api_token": self.api_key,
+            "Content-Type": "application/json"
+        })
+        self._session.headers.update(self._static_headers)
+
+        # Pool of threads used to fetch the devices locations concurrently,
+        # bounded to the same size of the connection pool, so every thread has its own pooled connection.
+        self._pool = ThreadPoolExecutor(max_workers=settings.MT02_API_MAX_CONCURRENCY, thread_name_prefix="mt02-api")
+
+    # Context manager support, so the session can be disposed with a "with" block.
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __del__(self):
+        self.close()
+
+    # Method to dispose the threads pool, the session and its pooled connections.
+    def close(self):
+        pool = getattr(self, "_pool", None)
+        if pool is not None:
+            pool.shutdown(wait=False)
+            self._pool = None
+
+        session = getattr(self, "_session", None)
+        if session is not None:
+            session.close()
+            self._session = None
     
-    # Helper method to construct headers for API requests.
+    # Helper method to construct the dynamic headers for API requests.
+    # The static ones are already set in the session.
     def _get_headers(self):
         return {
-            "api_token": self.api_key,
             "timestamp": str(int(time.time())),
-            "Content-Type": "application/json"
         }
     
-    # Method to fetch the list of devices from the MT02 API.
+    # Helper method to fetch a single page of the devices list.
+    def _get_page(self, page: int):
+        # Preparing requests.get arguments
+        url = f"{settings.MT02_API_BASE_URL}/tag/all"
+        params = {
+            "isActived": True,
+            "page": page,
+            "pageSize": settings.MT02_PAGE_SIZE,
+        }
+        headers = self._get_headers()
+
+        # Requesting response
+        response = self._session.get(url, params=params, headers=headers, timeout=(3.05, 10))
+        response.raise_for_status() # To catch HTTP errors
+
+        # Returning the json data as a dict
+        return orjson.loads(response.content)
+
+    # Helper method to discover the total of pages from the first page, when the API informs it.
+    @staticmethod
+    def _get_total_pages(page_data: dict):
+        total_pages = page_data.get("totalPages")
+        if total_pages:
+            return int(total_pages)
+
+        total, page_size = page_data.get("total"), page_data.get("pageSize")
+        if total and page_size:
+            return -(-int(total) // int(page_size)) # Ceil division
+
+        return None
+
+    # Method to fetch the list of devices from the MT02 API, raising the errors of the API.
     def fetch_devices(self):
         try:
+            # The first page is fetched alone, to know if there are more pages
+            page_data = self._get_page(1)
             
-            # Preparing requests.get arguments
-            url = f"{settings.MT02_API_BASE_URL}/tag/all"
-            params = {
-                "isActived": True,
-            }
-            headers = self._get_headers()
+            # Checking if there are devices on this page
+            if not page_data.get("data"):
+                return []
 
             # Preparing list to store all tags
-            all_devices = []
-            
-            # Starting the current page
-            current_page = 1
+            all_devices = list(page_data["data"])
+
+            # If the API informs the total of pages, all the others are fetched at once, concurrently
+            total_pages = self._get_total_pages(page_data)
+            if total_pages is not None:
+                for page_data in self._pool.map(self._get_page, range(2, total_pages + 1)):
+                    all_devices += page_data.get("data") or []
+
+                # Returning all devices encontered
+                return all_devices
+
+            # Else the end is only known by an empty page, so the pages are fetched in concurrent batches
+            # until the first empty page. The batches start with a single page and double up to 8,
+            # so a fleet that fits in one page costs only one more request
+            batch_size = 1
+            current_page = 2
             while True:
-                # Passing the current page as a parameter
-                params["page"] = current_page
-
-                # Requesting response
-                response = requests.get(url, params, headers=headers)
-                response.raise_for_status() # To catch HTTP errors
-
-                # Getting the json data as a dict
-                page_data = response.json()
-                
-                # Checking if there are devices on this page
-                if not page_data.get("data"):
-                    break
-                
-                # Storing devices
-                all_devices += page_data["data"]
-
-                # Turning page
-                current_page += 1
-
-            # Returning all devices encontered
-            return all_devices
+                pages = range(current_page, current_page + batch_size)
+                for page_data in self._pool.map(self._get_page, pages):
+                    if not page_data.get("data"):
+                        # Returning all devices encontered
+                        return all_devices
+
+                    # Storing devices
+                    all_devices += page_data["data"]
+
+                # Turning pages
+                current_page += batch_size
+                batch_size = min(batch_size * 2, 8)
         
+        # The errors are raised to the caller, so an unavailable API is not taken as an API without devices
+        # and the worker backs off, instead of polling it again on the next tick
         except requests.RequestException as e:
             logger.info(f"Error fetching devices: {e}")
-
-            return [] # To always receive a list
+            raise
         
         except Exception as e:
             logger.info(f"Unexpected error: {e}")
-
-            return [] # To always receive a list
+            raise
 
     # Method to fetch location data for a specific device by its ID.
     def fetch_device_location(self, device_id: str):
@@ -86,10 +168,10 @@ class MT02ApiClient:
             headers = self._get_headers()
 
             # Requesting the response
-            response = requests.get(url, headers=headers, params=params)
+            response = self._session.get(url, params=params, headers=headers, timeout=(3.05, 10))
             response.raise_for_status() # To catch HTTP errors
 
-            return response.json() # Returning the json location data as a dict
+            return orjson.loads(response.content) # Returning the json location data as a dict
         
         except requests.RequestException as e:
             logger.info(f"Error fetching location for device {device_id}: {e}")
@@ -97,28 +179,26 @@ class MT02ApiClient:
         except Exception as e:
             logger.info(f"Unexpected error: {e}")
 
-    # Method to fetch location data for all devices.
-    def fetch_all(self):
-        try:
-            # First we fetch all devices for the given token
-            devices = self.fetch_devices()
+    # Helper method to get the id of a device entry of the devices list.
+    # The entries can be the id itself or a dict with the "id" of the device.
+    @staticmethod
+    def get_device_id(device) -> str:
+        if isinstance(device, dict):
+            device = device.get("id")
 
-            # Checking if there are any device
-            if not devices:
-                logger.info("No devices found.")
-                return {}
-            
-            # If there are, declaring a variable store all locations from the devices previously fetched
-            all_locations = {}
-            
-            # For each device, we fetch the device location and stores it in "all_locations"
-            for device_id in devices:
-                location = self.fetch_device_location(device_id) # Fetch the location data
-                if location and location.get("data"):
-                    all_locations[str(device_id)] = location["data"] # Converting dev id to str
-
-            # Returning it
-            return all_locations
+        return str(device) # Converting dev id to str
+
+    # Method to fetch location data for the given devices.
+    def fetch_locations(self, device_ids: list):
+        # Declaring a variable store all locations from the devices
+        all_locations = {}
         
-        except Exception as e:
-            logger.info(f"Error fetching all device locations: {e}")
\ No newline at end of file
+        # For each device, we fetch the device location concurrently (the pool keeps the order of the devices)
+        # and stores it in "all_locations"
+        locations = self._pool.map(self.fetch_device_location, device_ids)
+        for device_id, location in zip(device_ids, locations):
+            if location and location.get("data"):
+                all_locations[device_id] = location["data"]
+
+        # Returning it
+        return all_locations
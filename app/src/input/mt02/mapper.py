@@ -1,26 +1,52 @@
+from dataclasses import dataclass
 from datetime import datetime
-from dateutil.relativedelta import relativedelta
 
 from app.core.logger import get_logger
-from app.services.redis_service import get_redis
 from .. import utils as input_source_utils
 
 logger = get_logger(__name__)
-redis_client = get_redis()
 
-def map_location_data(device_id: str, location: dict) -> dict:
+@dataclass(slots=True, frozen=True)
+class MappedLocation:
+    """
+    Location data in the internal format.
+    Uses slots instead of a dict, so each record is lighter and the access to the fields is faster.
+    """
+
+    timestamp: datetime
+    latitude: float
+    longitude: float
+    satellites: int
+    gps_odometer: float
+    voltage: float
+
+    def get(self, key: str, default=None):
+        """
+        Dict-like access to the fields, so the output builders can read it as they read a dict.
+
+        :param key: Field name
+        :type key: str
+        :param default: Value returned if there is no such field
+        :return: The field value
+        """
+        return getattr(self, key, default)
+
+def map_location_data(device_id: str, location: dict, state: dict) -> MappedLocation | None:
     """
     Map the raw location data from MT02 API to the internal format.
+    The device state is updated in place, so the caller can save it to the state storage.
 
     :param device_id: Device Identifier
     :type device_id: str
     :param location: Raw location data from MT02 API
     :type location: dict
-    :return: Mapped location data in internal format
-    :rtype: dict
+    :param state: Device state, as stored in the state storage
+    :type state: dict
+    :return: Mapped location data in internal format, None if the data is corrupted
+    :rtype: MappedLocation | None
     """
 
-    logger.info(f"Mapping location data for device {device_id}: {location}")
+    logger.info("Mapping location data for device {}: {}", device_id, location) # Formatted only if the level is enabled
 
     # First converting the timestamp
     date_time = datetime.fromtimestamp(location.get("timestamp", 0))
@@ -29,34 +55,25 @@ def map_location_data(device_id: str, location: dict) -> dict:
     lat, lon = location.get("lat"), location.get("lng")
     if not lat or not lon:
         logger.error(f"It was not possible to continue the mapping of the data, coordinates corrupted.")
-        return {}
-    
-    # If the lat and lon are reliable, lets construct the redis device key
-    device_key = device_key = f"device:mt02:{device_id}"
+        return None
 
-    # Retrieve the last_odometer from redis
-    odometer = redis_client.hget(device_key, "last_odometer")
-    
-    # If there are no odometer set it to 0
-    if not odometer:
-        odometer = 0
+    # Retrieve the last_odometer from the state, if there are no odometer set it to 0
+    odometer = float(state.get("last_odometer") or 0)
 
-    # Retrieve the last lat and last lon from redis
-    last_lat, last_lon = redis_client.hmget(device_key, "last_lat", "last_lon")
+    # Retrieve the last lat and last lon from the state
+    last_lat, last_lon = state.get("last_lat"), state.get("last_lon")
     
     # If there are last lat and lon, lets confirm that they are float types
     # And pass they to the haversine fórmula function
     if last_lat and last_lon:
-        args = list(map(float, [lat, lon, last_lat, last_lon])) # mapping float to every member of the iterable
-
         # Calculate haversine
-        meters_calculated = input_source_utils.haversine(*args)
+        meters_calculated = input_source_utils.haversine(float(lat), float(lon), float(last_lat), float(last_lon))
         
         # Adds it to odometer
         odometer += meters_calculated
 
-        # Save it to redis, so the next time it will be set
-        redis_client.hset(device_key, "last_odometer", odometer)
+        # Updating the state, so the next time it will be set
+        state["last_odometer"] = odometer
 
     else:
         # If there are not last lat and lon, lets return the 0 odometer
@@ -77,21 +94,21 @@ def map_location_data(device_id: str, location: dict) -> dict:
 
         # This way, we can use the voltage field on the binary packet to represent the battery of the device
 
-        # Saving it on the device state storage
-        redis_client.hset(device_key, "voltage", battery_based_voltage)
+        # Saving it on the device state
+        state["voltage"] = battery_based_voltage
     
     # ---
     
     # Mapping the data
-    #  to a structured python dict
-    mapped_data = {
-        "timestamp": date_time,
-        "latitude": lat,
-        "longitude": lon,
-        "satellites": 6, # Mock satellites so the server can accept our packets
-        "gps_odometer": odometer,
-        "voltage": battery_based_voltage or 1.11,
-    }
+    #  to a structured python object
+    mapped_data = MappedLocation(
+        timestamp=date_time,
+        latitude=lat,
+        longitude=lon,
+        satellites=6, # Mock satellites so the server can accept our packets
+        gps_odometer=odometer,
+        voltage=battery_based_voltage or 1.11,
+    )
     
     # Returning it
     return mapped_data
\ No newline at end of file
@@ -4,22 +4,38 @@ from app.src.session.output_session import output_processor
 
 logger = get_logger(__name__)
 
-def process_location(device_id: str, location: dict):
+def map_location(device_id: str, location: dict, state: dict) -> mapper.MappedLocation | None:
     """
-    Process the new location data for a device.
-    This function forwards the data to a mapper and then to output.
+    Map the new location data for a device to the internal format.
+    The device state is updated in place with the results of the mapping.
     
     :param device_id: Device Identifier
     :type device_id: str
     :param location: Device location data
     :type location: dict
+    :param state: Device state, as stored in the state storage
+    :type state: dict
+    :return: Mapped location data in internal format, None if the data is corrupted
+    :rtype: MappedLocation | None
     """
 
     with logger.contextualize(log_label=device_id):
-        logger.info(f"Processing location for device {device_id}: {location}")
+        # Map the location data to the internal format (the mapper logs the location)
+        return mapper.map_location_data(device_id, location, state)
 
-        # Map the location data to the internal format
-        mapped_data = mapper.map_location_data(device_id, location)
+def process_location(device_id: str, mapped_data: mapper.MappedLocation):
+    """
+    Process the mapped location data for a device.
+    This function forwards the data to output.
+    
+    :param device_id: Device Identifier
+    :type device_id: str
+    :param mapped_data: Location data already mapped to the internal format
+    :type mapped_data: MappedLocation
+    """
+
+    with logger.contextualize(log_label=device_id):
+        logger.info("Processing location for device {}: {}", device_id, mapped_data)
 
         # Forward the mapped data to the output processor
         output_processor.forward(device_id, mapped_data, "mt02")
\ No newline at end of file
@@ -1,62 +1,238 @@
+import atexit
+import random
 import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
 from . import processor
 from .api_client import MT02ApiClient
 from app.config.settings import settings
-from app.services.redis_service import get_redis
+from app.services.redis_service import get_redis_bytes
 from app.core.logger import get_logger
 
 logger = get_logger(__name__)
-redis_client = get_redis()
 
 api_client = MT02ApiClient(api_key=settings.MT02_API_KEY)
 
+# Pool of threads that processes the new locations, instead of creating a new thread for each one
+_pool = ThreadPoolExecutor(max_workers=settings.MT02_WORKER_PARALLELISM, thread_name_prefix="mt02-proc")
+atexit.register(_pool.shutdown, wait=True)
+
+# Back-pressure: limits how many locations can be waiting in the pool
+# So a slow downstream blocks the worker instead of piling up tasks in memory
+_pending = threading.BoundedSemaphore(settings.MT02_WORKER_MAX_PENDING)
+
+# Fields of the device state storage used by the worker and the mapper
+_STATE_FIELDS = ("last_timestamp", "last_odometer", "last_lat", "last_lon", "voltage")
+
+# Prefix of the device state storage keys, already encoded because redis sends the keys as bytes
+_KEY_PREFIX = b"device:mt02:"
+
+def _device_key(device_id: str) -> bytes:
+    """
+    Builds the key of the device in the state storage.
+
+    :param device_id: Device Identifier
+    :type device_id: str
+    :return: The device key
+    :rtype: bytes
+    """
+
+    return _KEY_PREFIX + (device_id.encode() if isinstance(device_id, str) else str(device_id).encode())
+
+def _submit_location(device_id: str, mapped_data: processor.mapper.MappedLocation):
+    """
+    Submits a mapped location to be processed by the pool, blocking if there are too many pending.
+
+    :param device_id: Device Identifier
+    :type device_id: str
+    :param mapped_data: Location data already mapped to the internal format
+    :type mapped_data: MappedLocation
+    """
+
+    _pending.acquire()
+    try:
+        future = _pool.submit(processor.process_location, device_id, mapped_data)
+    except Exception:
+        _pending.release()
+        raise
+
+    # Releasing the slot when the processing ends
+    future.add_done_callback(_on_location_processed)
+
+def _on_location_processed(future):
+    """
+    Releases the slot of a processed location, and logs the error of the processing if it failed,
+    because nobody else reads the result of the pool.
+
+    :param future: Future of the location processing
+    :type future: Future
+    """
+
+    _pending.release()
+    if future.cancelled():
+        return
+
+    error = future.exception()
+    if error is not None:
+        logger.opt(exception=error).error(f"Error processing location: {error}")
+
+# Process-local cache of the devices state, in front of redis: device_id -> (expires_at, state)
+# Only the worker thread uses it, and the worker is the only writer of these fields in redis
+_state_cache = {}
+
+def _cache_states(states: dict):
+    """
+    Stores a copy of the devices state in the process-local cache.
+
+    :param states: The state of each device, by device id
+    :type states: dict
+    """
+
+    expires_at = time.monotonic() + settings.MT02_STATE_CACHE_TTL_SECONDS
+    for device_id, state in states.items():
+        _state_cache[device_id] = (expires_at, dict(state))
+
+def _read_states(device_keys: dict) -> dict:
+    """
+    Reads the state of all devices, from the process-local cache when possible,
+    and from redis in a single round-trip, using a pipeline, for the others.
+
+    :param device_keys: Devices keys in the state storage, by device id
+    :type device_keys: dict
+    :return: The state of each device, by device id
+    :rtype: dict
+    """
+
+    # Dropping the expired entries of the cache
+    now = time.monotonic()
+    for device_id in [device_id for device_id, (expires_at, _) in _state_cache.items() if expires_at <= now]:
+        del _state_cache[device_id]
+
+    # Copies, so the mapping does not change the cached state before it is saved to redis
+    states = {device_id: dict(_state_cache[device_id][1]) for device_id in device_keys if device_id in _state_cache}
+    missing = [device_id for device_id in device_keys if device_id not in states]
+    if not missing:
+        return states
+
+    pipe = get_redis_bytes().pipeline(transaction=False)
+    for device_id in missing:
+        pipe.hmget(device_keys[device_id], *_STATE_FIELDS)
+
+    read_states = {
+        device_id: dict(zip(_STATE_FIELDS, values))
+        for device_id, values in zip(missing, pipe.execute())
+    }
+    _cache_states(read_states)
+
+    states.update(read_states)
+    return states
+
+def _sleep_until_next_tick():
+    """
+    Sleeps the interval between two ticks of the worker, plus a random jitter.
+    """
+
+    interval = settings.MT02_WORKER_SLEEP_SECONDS
+    time.sleep(interval + random.uniform(0, settings.MT02_WORKER_SLEEP_JITTER * interval))
+
 def worker():
     """
     Routine that performs the action of retrieve location data from the manufacturer API.
     """
 
+    # Sleep used after errors, it starts at the normal sleep, grows on consecutive errors and is reseted on success,
+    # so a failing upstream (the API or redis) is polled less often than a healthy one, never more
+    error_backoff = settings.MT02_WORKER_SLEEP_SECONDS
+
     # Main loop of the worker, that runs indefinitely.
     while True:
         try:
             with logger.contextualize(log_label="SERVER"):
-                # Fetch all location data from the API.
-                locations = api_client.fetch_all()
+                # Fetch all devices from the API.
+                devices = api_client.fetch_devices()
+                if not devices:
+                    logger.info("No devices found.")
+                    _sleep_until_next_tick()
+                    continue
+
+                # Building the keys of the devices only once, and reading the state of all devices at once
+                device_ids = [api_client.get_device_id(device) for device in devices]
+                device_keys = {device_id: _device_key(device_id) for device_id in device_ids}
+                states = _read_states(device_keys)
+
+                # Fetch the location data of all devices, the listing informs only their ids
+                locations = api_client.fetch_locations(device_ids)
                 if not locations:
                     logger.info("No location data retrieved this time.")
+                    _sleep_until_next_tick()
                     continue
 
-                logger.info(f"Fetched locations for {len(locations)} devices.")
+                logger.info(f"Fetched locations for {len(locations)} of {len(devices)} devices.")
+
+            # All the writes of this tick are staged here, and sent to redis at once
+            write_pipe = get_redis_bytes().pipeline(transaction=False)
+            changed_states = {}
+            mapped_locations = []
 
             # For each location, we check if the data was already processed in a past iteration.
-            for device_id, locations in locations.items():
+            for device_id, device_locations in locations.items():
                 with logger.contextualize(log_label=device_id): # Contextualizing the logs in this blok of code
+                    state = states[device_id]
+                    device_key = device_keys[device_id]
 
                     # Sorting the locations by date, and sending it in reverse order, from the past to the present
-                    sorted_locations = sorted(locations, key=lambda x: datetime.fromtimestamp(x.get("timestamp", 0)), reverse=True)
+                    sorted_locations = sorted(device_locations, key=lambda x: datetime.fromtimestamp(x.get("timestamp", 0)), reverse=True)
+
+                    # The state as read, to write back only the fields changed in this tick
+                    previous_state = dict(state)
 
+                    is_changed = False
                     for location in sorted_locations:
-                        device_key = f"device:mt02:{device_id}"
-                        last_processed_timestamp = redis_client.hget(device_key, "last_timestamp")
+                        last_processed_timestamp = state["last_timestamp"]
                         
-                        # If the location data is new (not processed before), we store it in Redis.
+                        # If the location data is new (not processed before), we store it in the state.
                         is_new = not last_processed_timestamp or int(location['timestamp']) > int(last_processed_timestamp)
                         if not is_new:
                             logger.info(f"No new location for device {device_id}.")
                             continue
                         
-                        # Store the new location timestamp in Redis to mark it as processed.
-                        redis_client.hset(device_key, "last_timestamp", location["timestamp"])
-                        logger.info(f"New location for device {device_id}: {location}")
+                        # Store the new location timestamp in the state to mark it as processed.
+                        state["last_timestamp"] = location["timestamp"]
+                        logger.info("New location for device {}: {}", device_id, location) # Formatted only if the level is enabled
 
-                        # Pass the new location to the processor for further handling.
-                        threading.Thread(target=processor.process_location, args=(device_id, location)).start()
+                        # Map the location data to the internal format, this also updates the state
+                        mapped_data = processor.map_location(device_id, location, state)
+                        is_changed = True
+                        if mapped_data is not None:
+                            mapped_locations.append((device_id, mapped_data))
 
+                    # Staging the fields of the state changed by the mapping, only them, so the fields of the device written
+                    # by others meanwhile are not overwritten with the values of the cache
+                    changed_fields = {
+                        field: value for field, value in state.items()
+                        if value is not None and value != previous_state.get(field)
+                    }
+                    if is_changed and changed_fields:
+                        write_pipe.hset(device_key, mapping=changed_fields)
+                        changed_states[device_id] = state
 
-            time.sleep(settings.MT02_WORKER_SLEEP_SECONDS) # Sleeping to not overload the server
+            # Saving the state of all devices before forwarding, so the output layer reads the updated state
+            if changed_states:
+                write_pipe.execute()
+                _cache_states(changed_states)
+
+            # Pass the new locations to the processor for further handling.
+            for device_id, mapped_data in mapped_locations:
+                _submit_location(device_id, mapped_data)
+
+            error_backoff = settings.MT02_WORKER_SLEEP_SECONDS
+            _sleep_until_next_tick() # Sleeping to not overload the server
 
         except Exception as e:
-            logger.info(f"Error in worker loop: {e}", log_label="SERVER")
-        
\ No newline at end of file
+            logger.info(f"Error in worker loop: {e}. Retrying in {error_backoff} seconds.", log_label="SERVER")
+
+            # Backing off exponentially, so a failing upstream is not hammered
+            time.sleep(error_backoff)
+            error_backoff = min(error_backoff * 2, max(settings.MT02_WORKER_MAX_ERROR_BACKOFF_SECONDS, settings.MT02_WORKER_SLEEP_SECONDS))
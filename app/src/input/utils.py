@@ -1,4 +1,7 @@
-from math import radians, sin, cos, atan2, sqrt
+from math import radians, sin, cos, asin, sqrt
+
+# Mean radius of the earth, in meters
+_EARTH_RADIUS_METERS = 6_371_000.0
 
 def haversine(lat1: float, lon1: float, lat2: float, lon2: float):
     """
@@ -15,13 +18,12 @@ def haversine(lat1: float, lon1: float, lat2: float, lon2: float):
     :type lon2: float
     """
 
-    # Obtaining the radians of each coordinate
-    lat1, lon1, lat2, lon2 = map(radians, [lat1, lon1, lat2, lon2])
+    # Obtaining the radians of the latitudes and of the differences
+    lat1r, lat2r = radians(lat1), radians(lat2)
+    dlat = radians(lat2 - lat1)
+    dlon = radians(lon2 - lon1)
 
-    # Rest of the formula (Not really know exacly how its internal working)    
-    dlon = lon2 - lon1 
-    dlat = lat2 - lat1 
-    a = sin(dlat/2)**2 + cos(lat1) * cos(lat2) * sin(dlon/2)**2
-    c = 2 * atan2(sqrt(a), sqrt(1-a)) 
-    r = 6371
-    return int((c * r) * 1000) # Convertendo para metros e int
\ No newline at end of file
+    # Rest of the formula, 2 * asin(sqrt(a)) is equivalent to 2 * atan2(sqrt(a), sqrt(1 - a)) for 0 <= a <= 1
+    # But with only one sqrt and without the atan2
+    a = sin(dlat * 0.5) ** 2 + cos(lat1r) * cos(lat2r) * sin(dlon * 0.5) ** 2
+    return int(2.0 * _EARTH_RADIUS_METERS * asin(sqrt(a))) # In meters and int
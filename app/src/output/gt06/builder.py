@@ -1,4 +1,5 @@
 import struct
+import threading
 from datetime import datetime
 
 from app.core.logger import get_logger
@@ -8,71 +9,171 @@ from app.config.settings import settings
 
 logger = get_logger(__name__)
 
-def build_location_packet(dev_id: str, packet_data: dict, serial_number: int, *args) -> bytes:
+# Logger that calls its arguments only if the message is logged,
+# so the hex dumps of the packets are not made when its level is disabled
+lazy_logger = logger.opt(lazy=True)
+
+# Start bytes of the packets, the information packets have their own start bytes
+_PACKET_START = b"\x78\x78"
+_INFO_PACKET_START = b"\x79\x79"
+
+# Stop bytes of all the packets
+_PACKET_END = b"\x0d\x0a"
+
+# Gps information length, fixed to 12 (0xC in Hex), already in the high nibble of the gps info byte
+_GPS_INFO_LENGTH = 0xC0
+
+# The coordinates are sent as integers, in 1/1800000 of degree (1/30000 of minute)
+_COORDINATE_SCALE = 1800000
+
+# Compiled structs of the packets, so the formats are parsed only once, at import
+
+# Content body of the location packet: date time (6 bytes), gps info (1), latitude and longitude (4 + 4), speed (1), course and status (2)
+_LOCATION_CONTENT_FORMAT = "BBBBBBBIIBH"
+
+# The fields after the content body, according to the protocol number
+# Each function returns the values of the fields, in the order of the format of its protocol number
+#
+# The LBS information (mcc, mnc, lac and cell id) is mocked, all zeros. So it is a block of pad bytes ("x") in the formats,
+# that the struct fills with zeros by itself, and it is not passed on each packet.
+# LBS information in the GT06 protocol are numbers identifying the country, mobile network provider, geographic area and the cell network tower
+#
+# The same for the two zeros after the acc status, the "Data Upload - Upload Mode" and the "Realtime Positioning" fields,
+# the last one tells if this packet is in realtime, in order to a internal business rule, 
+# this field will be fixed at "x00" that means realtime positioning.
+def _location_tail_0x22(acc_status: int, gps_odometer: int, voltage_raw: int) -> tuple:
+    return (acc_status, gps_odometer)
+
+def _location_tail_0x32_0xA0(acc_status: int, gps_odometer: int, voltage_raw: int) -> tuple:
+    return (acc_status, gps_odometer, voltage_raw)
+
+def _location_tail_empty(acc_status: int, gps_odometer: int, voltage_raw: int) -> tuple:
+    return ()
+
+_LOCATION_TAILS = {
+    0x12: ("8x", _location_tail_empty),                     # LBS: mcc (2 bytes), mnc (1), lac (2), cell id (3)
+    0x22: ("8xB2xI", _location_tail_0x22),                  # LBS: mcc (2 bytes), mnc (1), lac (2), cell id (3); acc, upload mode, realtime, mileage
+    0x32: ("9xB2xIH6x", _location_tail_0x32_0xA0),          # LBS: mcc (2 bytes), mnc (1), lac (2), cell id (4); acc, upload mode, realtime, mileage, voltage, 6 reserved bytes
+    0xA0: ("16xB2xIH", _location_tail_0x32_0xA0),           # LBS: mcc (2 bytes), mnc (2), lac (4), cell id (8); acc, upload mode, realtime, mileage, voltage
+}
+
+# The 3 flags of the course and status field (GPS fixed, west longitude and north latitude), in the bits 12, 11 and 10,
+# for every combination of them, indexed by (gps_fixed << 2) | (is_longitude_west << 1) | is_latitude_north
+_COURSE_STATUS_FLAGS = tuple(
+    ((flags >> 2) << 12) | (((flags >> 1) & 1) << 11) | ((flags & 1) << 10) for flags in range(8)
+)
+
+# The terminal info byte of the heartbeat for every output status and acc status, indexed by [output_status][acc_status]
+# Output status in the bit 7, GPS tracking on (bit 6), charging (bit 2), acc status in the bit 1 and defense activated (bit 0)
+_TERMINAL_INFO_CONTENTS = tuple(
+    tuple((output_status << 7) | (1 << 6) | (1 << 2) | (acc_status << 1) | 1 for acc_status in range(2))
+    for output_status in range(2)
+)
+
+# End of all the packets: CRC + stop bytes
+_PACKET_TRAILER_STRUCT = struct.Struct(">H2s")
+
+# Login packet, from the length to the serial number:
+# length, protocol number, device id (8 bytes of BCD), serial number
+_LOGIN_STRUCT = struct.Struct(">BB8sH")
+
+# Heartbeat packet, from the length to the serial number:
+# length, protocol number, terminal info, voltage level, gsm signal strength, alarm, language, serial number
+_HEARTBEAT_STRUCT = struct.Struct(">BBBBBBBH")
+
+# Voltage information packet, from the length to the serial number:
+# length (2 bytes), protocol number, sub-protocol number, voltage, serial number
+_VOLTAGE_INFO_STRUCT = struct.Struct(">HBBHH")
+
+# Size of the scratch buffers, bigger than the biggest packet
+_SCRATCH_BUFFER_SIZE = 128
+
+# Scratch buffer of each thread, where the packets are mounted before being copied to the final bytes
+# Each thread has its own, so the packets can be built by many threads at once, without allocating a new buffer per packet
+_thread_local = threading.local()
+
+def _get_scratch_buffer() -> bytearray:
     """
-    Builds a GT06 location packet from the "packet_data" data source.
-    Suports different types of protocols (protocol_number): 0x22, 0x32, 0xA0 
+    Gets the scratch buffer of the current thread, creating it on the first use.
+    
+    :return: The scratch buffer
+    :rtype: bytearray
+    """
+
+    buffer = getattr(_thread_local, "buffer", None)
+    if buffer is None:
+        buffer = _thread_local.buffer = bytearray(_SCRATCH_BUFFER_SIZE)
+
+    return buffer
+
+def _finish_packet(buffer: bytearray, packet_start: bytes, crc_offset: int) -> bytes:
+    """
+    Finishes a packet mounted in the scratch buffer, from the length (offset 2) to the serial number (ending at crc_offset).
+    Writes the start bytes, the CRC and the stop bytes, and copies the packet out of the buffer.
+    
+    :param buffer: The scratch buffer
+    :type buffer: bytearray
+    :param packet_start: Start bytes of the packet
+    :type packet_start: bytes
+    :param crc_offset: Offset of the CRC in the packet, the end of the data that is checked
+    :type crc_offset: int
+    :return: The binary packet
+    :rtype: bytes
+    """
+
+    buffer[0:2] = packet_start
+
+    with memoryview(buffer) as view:
+        # CRC: Its a corruption checking algorithm, it uses a series of calculations to get a final number
+        # If the receiver of the packet calculate the CRC of the packet and it is not equal to this CRC calculated here
+        # Means that the packet is corrupted, data have been lost, or other infinite causes to this.
+        # It is calculated from the length to the serial number. The slice of the view is not a copy,
+        # but crc_itu copies these few bytes once, to reflect their bits before the C loop
+        crc = gt06_utils.crc_itu(view[2:crc_offset])
+
+        # The CRC and the stop bytes are written at once
+        _PACKET_TRAILER_STRUCT.pack_into(buffer, crc_offset, crc, _PACKET_END)
+
+        # Copying the final packet, so the buffer can be reused
+        return bytes(view[:crc_offset + _PACKET_TRAILER_STRUCT.size])
+
+def _extract_location_fields(packet_data: dict) -> tuple:
+    """
+    Extracts the fields of the location packet from the "packet_data" data source,
+    converting and masking each one to its size in the packet, all at once.
     
-    :param dev_id: Device Identifier
-    :type dev_id: str
     :param packet_data: Structured Dictionary with the necessary data and fields to build the location packet
     :type packet_data: dict
-    :param serial_number: Number of this packet
-    :type serial_number: int
-    :param args: Optional args, mainteined for compatibility
-    :return: The location binary packet
-    :rtype: bytes
+    :return: gps info, latitude, longitude, speed, course and status, acc status, odometer and voltage, ready to be packed
+    :rtype: tuple
     """
 
-    # Note on struct: struct is a python library used to pack python native types (ex: int, string, float, etc...)
-    # Into a binary data, or to unpack binary data into python native types.
-    # The methods struct.pack and struct.unpack needs the developer to specify the format in the first argument
-    # ">" Means "Big Endian" it's the "orientation" of the number, so how we read "1000" from left to right
-    # the binary data must be read this way (in other hand "<" means "Little Endian" wich is the opposite)
-    # "B" means "Byte" or "One Byte" it tells struct to pack python data into a single byte or to unpack a single byte to a python data
-    # "H" means "Word" or "Two bytes" and follows the same logic, so how are "I" and "Q".
-
-    logger.info(f"Building GT06 Location packet for device {dev_id} with serial number {serial_number} and data: {packet_data}")
-
-    # Protocol Number is a integer identifying the variation of the location packet
-    # variations provide different structures and informations for location packets
-    protocol_number = settings.GT06_LOCATION_PACKET_PROTOCOL_NUMBER # We will use the protocol_number specified in settings
-
-    # First we get the timestamp from the packet data
-    # and dissecate it part-by-part, pass it to struct and pack into "time_bytes"
-    timestamp: datetime = packet_data.get("timestamp", datetime.now())
-    time_bytes = struct.pack(
-        ">BBBBBB", # We pass this format, that means one byte for each part of the date, in ">" Big Endian
-        timestamp.year % 100, # Module of the year, gets only the final part. Ex: 2025 -> 25
-        timestamp.month,
-        timestamp.day,
-        timestamp.hour,
-        timestamp.minute,
-        timestamp.second,
-    )
+    # Reading all the fields at once, with the lookup of the "get" method done only once
+    get = packet_data.get
+    packet_satellites = get("satellites", 0)
+    latitude_val = get("latitude", 0.0)
+    longitude_val = get("longitude", 0.0)
+    packet_speed_kmh = get("speed_kmh", 0)
+    packet_direction = get("direction", 0)
+    packet_gps_fixed = get("gps_fixed", False)
+    packet_acc_status = get("acc_status", 1)
+    packet_gps_odometer = get("gps_odometer", 0)
+    packet_voltage = get("voltage", 0.0)
 
     # Now we will mount the gps info length and quantity of satellites byte
     # this byte combine two informations, the gps information length that is fixed to 12 (0xC in Hex)
     # And the quantity of satellites
-    packet_satellites = packet_data.get("satellites", 0)
     satellites = min(15, packet_satellites) # The quantity of satellites field in the GT06 protocol have a fixed length of a nibble (4 bits, max decimal value of 15)
-    gps_info = 0xC0 | satellites # Now we apply a mask (OR) to merge the two informations into a single byte
-    gps_info_byte = struct.pack(">B", gps_info)
+    gps_info = _GPS_INFO_LENGTH | satellites # Now we apply a mask (OR) to merge the two informations into a single byte
 
     # Mounting the latitude and longitue bytes
-    latitude_val = packet_data.get("latitude", 0.0)
-    longitude_val = packet_data.get("longitude", 0.0)
-    
-    # converting the floating point values of lat and long into integers
-    lat_raw = int(abs(latitude_val) * 1800000)
-    lon_raw = int(abs(longitude_val) * 1800000)
-
-    # Packing it into "lat_lon_bytes"
-    lat_lon_bytes = struct.pack(">II", lat_raw, lon_raw)
+    # converting the floating point values of lat and long into integers (in 1/1800000 of degree, rounded to the nearest)
+    # Only the magnitude goes here, the sign goes to the course and status hemisfers
+    lat_raw = int(abs(latitude_val) * _COORDINATE_SCALE + 0.5)
+    lon_raw = int(abs(longitude_val) * _COORDINATE_SCALE + 0.5)
 
     # Mouting the speed kmh byte
-    speed_kmh = int(packet_data.get("speed_kmh", 0))
-    speed_kmh_bytes = struct.pack(">B", speed_kmh)
+    speed_kmh = int(packet_speed_kmh)
 
     # Mouting the course and status byte
     # Course and status byte carryes various informations
@@ -81,118 +182,129 @@ def build_location_packet(dev_id: str, packet_data: dict, serial_number: int, *a
 
     # Here we apply a mask that isolates the 11 last significant bytes (the ones to the rigth)
     # To have the certainty that this field only ocupates 11 bits length
-    direction = int(packet_data.get("direction", 0)) & 0x03FF
+    direction = int(packet_direction) & 0x03FF
 
     # Then we prepare the other information tu put in the five bits left
-    gps_fixed = 1 if packet_data.get("gps_fixed", False) else 0
-    
-    is_latitude_north = 1 if latitude_val >= 0 else 0 # Deciding the hemisfer of latitude
-    is_longitude_west = 1 if longitude_val < 0 else 0 # Deciding the hemisfer of longitude
+    # They are bools, that are the integers 0 and 1 in python, so they are used directly as the index of the flags table
+    gps_fixed = bool(packet_gps_fixed)
+
+    is_latitude_north = latitude_val >= 0 # Deciding the hemisfer of latitude
+    is_longitude_west = longitude_val < 0 # Deciding the hemisfer of longitude
+
+    # Here we use a mask (OR) to combine the direction byte with the others informations (already in place in the table)
+    # packing it to a 2 bytes length field
+    course_status = _COURSE_STATUS_FLAGS[(gps_fixed << 2) | (is_longitude_west << 1) | is_latitude_north] | direction
 
-    # Here we use a mask (OR) to combine the direction byte with the others informations packing it to a 2 bytes length field
-    course_status = (gps_fixed << 12) | (is_longitude_west << 11) | (is_latitude_north << 10) | direction
-    course_status_bytes = struct.pack(">H", course_status) # Packing it
-    
     # ==============================================================================================================================
-    # Finally putting it all together, forming the body of the packet
-    content_body = time_bytes + gps_info_byte + lat_lon_bytes + speed_kmh_bytes + course_status_bytes
-    
     # These fields fow now are outside of the content body previously mounted because
     # They can have different sizes and locations on the packet structure according to the protocol_number
-    acc_status = 1 if packet_data.get("acc_status", 1) else 0
-    gps_odometer = int(packet_data.get("gps_odometer", 0))
-    voltage = float(packet_data.get("voltage", 0.0))
-    voltage_raw = int(voltage * 100)
-
-    # Mock LBS information
-    # LBS information in the GT06 protocol are numbers identifying the country, mobile network provider, geographic area and the cell network tower
-    mcc = 0
-    mnc = 0
-    lac = 0
-    cell_id = 0
-
-    # Packing the fields according to the rules of the 0x12 protocol number
-    if protocol_number == 0x12:
-        content_body += struct.pack(">H", mcc)
-        content_body += struct.pack(">B", mnc)
-        content_body += struct.pack(">H", lac)
-        content_body += cell_id.to_bytes(3, "big")
-
-    # Packing the fields according to the rules of the 0x22 protocol number
-    elif protocol_number == 0x22:
-        content_body += struct.pack(">H", mcc)
-        content_body += struct.pack(">B", mnc)
-        content_body += struct.pack(">H", lac)
-        content_body += cell_id.to_bytes(3, "big")
-
-        content_body += struct.pack(">B", acc_status)
-        content_body += b'\x00' # Data Upload - Upload Mode
-
-        # This field is called "Realtime Positioning" and tells if this packet is in realtime, 
-        # in order to a internal business rule, this field will be fixed at "x00" that means realtime positioning.
-        content_body += b'\x00' 
-        content_body += struct.pack(">I", gps_odometer) # Mileage
-
-    # Packing the fields according to the rules of the 0x32 protocol number
-    elif protocol_number == 0x32:
-        content_body += struct.pack(">H", mcc)
-        content_body += struct.pack(">B", mnc)
-        content_body += struct.pack(">H", lac)
-        content_body += struct.pack(">I", cell_id)
-
-        content_body += struct.pack(">B", acc_status)
-        content_body += b'\x00'
-
-        # This field is called "Realtime Positioning" and tells if this packet is in realtime, 
-        # in order to a internal business rule, this field will be fixed at "x00" that means realtime positioning.
-        content_body += b'\x00'
-        content_body += struct.pack(">I", gps_odometer)
-        content_body += struct.pack(">H", voltage_raw)
-        content_body += b"\x00" * 6
-
-    # Packing the fields according to the rules of the 0xA0 protocol number
-    elif protocol_number == 0xA0:
-        content_body += struct.pack(">H", mcc)
-        content_body += struct.pack(">H", mnc)
-
-        content_body += struct.pack(">I", lac)
-        content_body += struct.pack(">Q", cell_id)
-
-
-        content_body += struct.pack(">B", acc_status)
-        content_body += b'\x00'
-
-        # This field is called "Realtime Positioning" and tells if this packet is in realtime, 
-        # in order to a internal business rule, this field will be fixed at "x00" that means realtime positioning.
-        content_body += b'\x00'
-        content_body += struct.pack(">I", gps_odometer)
-        content_body += struct.pack(">H", voltage_raw)
-
-    # Creating the length of the packet field that represents the length of the content_body
-    # + protocol number + serial number + CRC Check
-    length_value = 1 + len(content_body) + 2 + 2
-    length_byte = struct.pack(">B", length_value)
-
-    # Mouting all together and preparing to calculate CRC
-    data_for_crc = length_byte + struct.pack(">B", protocol_number) + content_body + struct.pack(">H", serial_number)
-
-    # CRC: Its a corruption checking algorithm, it uses a series of calculations to get a final number
-    # If the receiver of the packet calculate the CRC of the packet and it is not equal to this CRC calculated here
-    # Means that the packet is corrupted, data have been lost, or other infinite causes to this.   
-    crc = gt06_utils.crc_itu(data_for_crc)
-    crc_bytes = struct.pack(">H", crc)
-
-    # Finally mouting the final packet
-    final_packet = (
-        b"\x78\x78" +
-        data_for_crc +
-        crc_bytes +
-        b"\x0d\x0a"
-    )
+    acc_status = 1 if packet_acc_status else 0
+    gps_odometer = int(packet_gps_odometer)
+    voltage = float(packet_voltage)
+    voltage_raw = int(voltage * 100 + 0.5) # Rounded, so 12.34 (1233.9999... when scaled) is not packed as 12.33
 
-    # Returning it
-    logger.debug(f"GT06 Location packet built (Protocol {hex(protocol_number)}): {final_packet.hex()}")
-    return final_packet
+    return gps_info, lat_raw, lon_raw, speed_kmh, course_status, acc_status, gps_odometer, voltage_raw
+
+def _make_location_builder(protocol_number: int):
+    """
+    Makes the builder of the location packet specialized to a protocol number,
+    so the struct of the packet and the fields of the protocol number are resolved only once, and not on each packet.
+    
+    :param protocol_number: Integer identifying the variation of the location packet (0x12, 0x22, 0x32, 0xA0)
+    :type protocol_number: int
+    :return: The location packet builder
+    """
+
+    # The fields after the content body (none if the protocol number has no extra fields)
+    tail_format, location_tail = _LOCATION_TAILS.get(protocol_number, ("", _location_tail_empty))
+
+    # The whole packet, from the length to the serial number, is packed at once by a single struct:
+    # length + protocol number + content body + fields of the protocol number + serial number
+    packet_struct = struct.Struct(">BB" + _LOCATION_CONTENT_FORMAT + tail_format + "H")
+    crc_offset = 2 + packet_struct.size # Start bytes + the packed data
+
+    # Creating the length of the packet field that represents the length of the content body
+    # + protocol number + serial number + CRC Check
+    length_value = packet_struct.size - 1 + 2
+
+    # Used only in the logs
+    protocol_number_hex = hex(protocol_number)
+
+    def build_location_packet(dev_id: str, packet_data: dict, serial_number: int, *args) -> bytes:
+        """
+        Builds a GT06 location packet from the "packet_data" data source.
+        Suports different types of protocols (protocol_number): 0x12, 0x22, 0x32, 0xA0
+
+        :param dev_id: Device Identifier
+        :type dev_id: str
+        :param packet_data: Structured Dictionary with the necessary data and fields to build the location packet
+        :type packet_data: dict
+        :param serial_number: Number of this packet
+        :type serial_number: int
+        :param args: Optional args, mainteined for compatibility
+        :return: The location binary packet
+        :rtype: bytes
+        """
+
+        # Note on struct: struct is a python library used to pack python native types (ex: int, string, float, etc...)
+        # Into a binary data, or to unpack binary data into python native types.
+        # The methods struct.pack and struct.unpack needs the developer to specify the format in the first argument
+        # ">" Means "Big Endian" it's the "orientation" of the number, so how we read "1000" from left to right
+        # the binary data must be read this way (in other hand "<" means "Little Endian" wich is the opposite)
+        # "B" means "Byte" or "One Byte" it tells struct to pack python data into a single byte or to unpack a single byte to a python data
+        # "H" means "Word" or "Two bytes" and follows the same logic, so how are "I" and "Q".
+
+        logger.info("Building GT06 Location packet for device {} with serial number {} and data: {}", dev_id, serial_number, packet_data) # Formatted only if the level is enabled
+
+        # First we get the timestamp from the packet data (the current time is used only when there is none)
+        # and dissecate it part-by-part
+        timestamp: datetime = packet_data.get("timestamp")
+        if timestamp is None:
+            timestamp = datetime.now()
+
+        year, month, day = timestamp.year % 100, timestamp.month, timestamp.day # Module of the year, gets only the final part. Ex: 2025 -> 25
+        hour, minute, second = timestamp.hour, timestamp.minute, timestamp.second
+
+        # Then all the other fields, already converted and masked to their sizes in the packet
+        (
+            gps_info, lat_raw, lon_raw, speed_kmh, course_status,
+            acc_status, gps_odometer, voltage_raw,
+        ) = _extract_location_fields(packet_data)
+
+        # Every field is packed in its place of the scratch buffer, without creating intermediate bytes objects
+        buffer = _get_scratch_buffer()
+
+        # Finally putting it all together, forming the body of the packet (after the start bytes)
+        packet_struct.pack_into(
+            buffer, 2,
+            length_value,
+            protocol_number,
+            year,
+            month,
+            day,
+            hour,
+            minute,
+            second,
+            gps_info,
+            lat_raw,
+            lon_raw,
+            speed_kmh,
+            course_status,
+            *location_tail(acc_status, gps_odometer, voltage_raw), # The fields of the protocol number
+            serial_number,
+        )
+
+        # Finally mouting the final packet, with the start bytes, CRC and stop bytes
+        final_packet = _finish_packet(buffer, _PACKET_START, crc_offset)
+
+        # Returning it
+        lazy_logger.debug("GT06 Location packet built (Protocol {}): {}", lambda: protocol_number_hex, final_packet.hex)
+        return final_packet
+
+    return build_location_packet
+
+# The protocol number does not change at runtime, so the builder is specialized to the one specified in settings
+build_location_packet = _make_location_builder(settings.GT06_LOCATION_PACKET_PROTOCOL_NUMBER)
 
 def build_login_packet(dev_id: str, serial_number: int) -> bytes:
     """
@@ -206,7 +318,7 @@ def build_login_packet(dev_id: str, serial_number: int) -> bytes:
     :rtype: bytes
     """
 
-    logger.info(f"Building GT06 Login packet for device {dev_id} with serial number {serial_number}")
+    logger.info("Building GT06 Login packet for device {} with serial number {}", dev_id, serial_number)
 
     # The default protocol number for login packets is 0x01
     protocol_number = 0x01
@@ -217,33 +329,22 @@ def build_login_packet(dev_id: str, serial_number: int) -> bytes:
     # Encoding the normalized device id to BCD - Binary Encoded Decimal 
     dev_id_bcd = gt06_utils.dev_id_to_bcd(output_dev_id)
 
-    # Mouting it together
-    packet_content_for_crc = (
-        struct.pack(">B", protocol_number) +
-        dev_id_bcd +
-        struct.pack(">H", serial_number)
+    # Packing all the data at once into the scratch buffer (after the start bytes), the length of the packet is the length of
+    # protocol number + device id + serial number + CRC
+    buffer = _get_scratch_buffer()
+    _LOGIN_STRUCT.pack_into(
+        buffer, 2,
+        _LOGIN_STRUCT.size - 1 + 2, # Length of the packet, everything but itself, plus the CRC
+        protocol_number,
+        dev_id_bcd,
+        serial_number,
     )
 
-    # Calculating the length of the packet
-    packet_length_value = len(packet_content_for_crc) + 2
-
-    # Mouting it together
-    data_for_crc = struct.pack(">B", packet_length_value) + packet_content_for_crc
-
-    # Calculating CRC error check
-    crc = gt06_utils.crc_itu(data_for_crc)
-
-    # Mounting the full final packet
-    full_packet = (
-        b"\x78\x78" +
-        struct.pack(">B", packet_length_value) +
-        packet_content_for_crc +
-        struct.pack(">H", crc) +
-        b"\x0d\x0a"
-    )
+    # Mounting the full final packet, calculating CRC error check
+    full_packet = _finish_packet(buffer, _PACKET_START, 2 + _LOGIN_STRUCT.size)
 
     # Returning it
-    logger.debug(f"GT06 login packet built: {full_packet.hex()}")
+    lazy_logger.debug("GT06 login packet built: {}", full_packet.hex)
     return full_packet
 
 
@@ -260,7 +361,7 @@ def build_heartbeat_packet(dev_id: str, status_kwargs: dict = {}) -> bytes:
     :rtype: bytes
     """
     
-    logger.info(f"Building GT06 Heartbeat packet for device {dev_id}")
+    logger.info("Building GT06 Heartbeat packet for device {}", dev_id)
 
     # Retrieving information from status_kwargs
     acc_status = status_kwargs.get("acc_status", 1)
@@ -271,47 +372,29 @@ def build_heartbeat_packet(dev_id: str, status_kwargs: dict = {}) -> bytes:
     # The default protocol number for login packets is 0x13
     protocol_number = 0x13
 
-    # Merging these values using a mask (OR) into a single byte
-    terminal_info_content = (int(output_status) << 7) | (1 << 6) | (1 << 2) | (int(acc_status) << 1) | 1
-    terminal_info_content_bytes = struct.pack(">B", terminal_info_content)
-
-    # Packing the other data to bytes
-    voltage_level_bytes = struct.pack(">B", voltage_level)
-    gsm_signal_strenght_bytes = struct.pack(">B", 0x04)
-    alarm_bytes = struct.pack(">B", 0x00)
-    language_bytes = struct.pack(">B", 0x02)
-    serial_bytes = struct.pack(">H", int(serial_number))
-
-    # Mounting it together
-    data_for_crc = (
-        struct.pack(">B", protocol_number) +
-        terminal_info_content_bytes +
-        voltage_level_bytes +
-        gsm_signal_strenght_bytes +
-        alarm_bytes +
-        language_bytes +
-        serial_bytes
+    # Getting the single byte with these values already merged
+    terminal_info_content = _TERMINAL_INFO_CONTENTS[bool(output_status)][bool(acc_status)]
+
+    # Packing all the data at once into the scratch buffer (after the start bytes), the length of the packet is the length of
+    # protocol number + terminal info + voltage level + gsm signal strength + alarm + language + serial number
+    buffer = _get_scratch_buffer()
+    _HEARTBEAT_STRUCT.pack_into(
+        buffer, 2,
+        _HEARTBEAT_STRUCT.size - 1, # Length of the packet, everything but itself
+        protocol_number,
+        terminal_info_content,
+        voltage_level,
+        0x04, # GSM signal strength
+        0x00, # Alarm
+        0x02, # Language
+        int(serial_number),
     )
 
-    # Calculating the length of the packet
-    packet_lenght = len(data_for_crc)
-
-    # Mouting it together
-    data_for_crc = (struct.pack(">B", packet_lenght) + data_for_crc)
-
-    # Calculating the CRC error check
-    crc = gt06_utils.crc_itu(data_for_crc)
-
-    # Mouting the final packet
-    full_packet = (
-        b"\x78\x78" + 
-        data_for_crc +
-        struct.pack(">H", crc) +
-        b"\x0D\x0A"
-    )
+    # Mouting the final packet, calculating the CRC error check
+    full_packet = _finish_packet(buffer, _PACKET_START, 2 + _HEARTBEAT_STRUCT.size)
 
     # returning it
-    logger.debug(f"GT06 heartbeat packet built: {full_packet.hex()}")
+    lazy_logger.debug("GT06 heartbeat packet built: {}", full_packet.hex)
     return full_packet
 
 
@@ -330,44 +413,31 @@ def build_voltage_info_packet(dev_id: str, voltage: float, serial_number: int) -
     :rtype: bytes
     """
 
-    logger.info(f"Building GT06 Information packet for device {dev_id} with voltage {voltage} and serial number {serial_number}")
+    logger.info("Building GT06 Information packet for device {} with voltage {} and serial number {}", dev_id, voltage, serial_number)
 
     # The protocol number for information packets is 0x94
     protocol_number = 0x94
     # In information packets there are sub-protocols, for voltage information the sub-protocol number is 0x00
     sub_protocol_number = 0x00
 
-    # Packing the voltage information
-    voltage_raw = int(voltage * 100)
-    information_content = struct.pack(">H", voltage_raw)
-
-    # Mounting the body of the packet
-    body_packet = (
-        struct.pack(">B", protocol_number) +
-        struct.pack(">B", sub_protocol_number) +
-        information_content +
-        struct.pack(">H", serial_number)
+    # Packing the voltage information, rounded to the nearest hundredth of volt
+    voltage_raw = int(voltage * 100 + 0.5)
+
+    # Packing all the data at once into the scratch buffer (after the start bytes), the length of the packet is the length of
+    # protocol number + sub-protocol number + voltage + serial number + CRC
+    buffer = _get_scratch_buffer()
+    _VOLTAGE_INFO_STRUCT.pack_into(
+        buffer, 2,
+        _VOLTAGE_INFO_STRUCT.size - 2 + 2, # Length of the packet, everything but itself, plus the CRC
+        protocol_number,
+        sub_protocol_number,
+        voltage_raw,
+        serial_number,
     )
 
-    # Calculating the length of the packet
-    packet_length_value = len(body_packet) + 2
-    packet_length_bytes = struct.pack(">H", packet_length_value)
-
-    # Mouting it all together to calculate the CRC
-    data_for_crc = packet_length_bytes + body_packet
-    
-    # Calculating the CRC error check
-    crc = gt06_utils.crc_itu(data_for_crc)
-    crc_bytes = struct.pack(">H", crc)
-
-    # Mouting the final packet
-    final_packet = (
-        b"\x79\x79" + 
-        data_for_crc +
-        crc_bytes +   
-        b"\x0d\x0a"   
-    )
+    # Mouting the final packet, calculating the CRC error check
+    final_packet = _finish_packet(buffer, _INFO_PACKET_START, 2 + _VOLTAGE_INFO_STRUCT.size)
 
     # Returning it
-    logger.info(f"GT06 Information packet built (Protocol {hex(protocol_number)}): {final_packet.hex()}")
+    lazy_logger.info("GT06 Information packet built (Protocol {}): {}", lambda: hex(protocol_number), final_packet.hex)
     return final_packet
\ No newline at end of file
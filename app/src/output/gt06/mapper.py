@@ -2,6 +2,18 @@ from app.core.logger import get_logger
 
 logger = get_logger(__name__)
 
+# Logger that calls its arguments only if the message is logged
+lazy_logger = logger.opt(lazy=True)
+
+# GT06 commands and their universal commands, built only once
+_COMMAND_MAPPING = {
+    "RELAY,1#": "OUTPUT ON",
+    "DYD,000000#": "OUTPUT ON",
+    "RELAY,0#": "OUTPUT OFF",
+    "HFYD,000000#": "OUTPUT OFF",
+    "GPRS,GET,LOCATION#": "PING",
+}
+
 def map_command(dev_id: str, command: bytes):
     """
     Map GT06 specific command bytes to a universal command format.
@@ -9,23 +21,15 @@ def map_command(dev_id: str, command: bytes):
     :param dev_id: Description
     :type dev_id: str
     :param command: Description
-    :type command: bytes
+    :type command: bytes | memoryview
     """
-    logger.info(f"Mapping GT06 command to universal format. command_bytes={command.hex()}")
+    lazy_logger.info("Mapping GT06 command to universal format. command_bytes={}", command.hex) # The hex is made only if the level is enabled
 
     command_length = command[4] - 4
     command_content = command[9:9 + command_length]
-    command_key = command_content.decode("ascii", errors="ignore")
-
-    logger.info(f"Extracted command key: {command_key}")
+    command_key = str(command_content, "ascii", "ignore") # Decodes bytes and memoryviews of the receive buffer alike
 
-    command_mapping = {
-        "RELAY,1#": "OUTPUT ON",
-        "DYD,000000#": "OUTPUT ON",
-        "RELAY,0#": "OUTPUT OFF",
-        "HFYD,000000#": "OUTPUT OFF",
-        "GPRS,GET,LOCATION#": "PING",
-    }
+    logger.info("Extracted command key: {}", command_key)
 
     if command_key.startswith("MILEAGE"):
         kilometers = command_key.split("ON,")[-1].replace("#", "")
@@ -36,4 +40,4 @@ def map_command(dev_id: str, command: bytes):
         meters = int(kilometers) * 1000
         return f"HODOMETRO:{meters}"
 
-    return command_mapping.get(command_key)
\ No newline at end of file
+    return _COMMAND_MAPPING.get(command_key)
\ No newline at end of file
@@ -1,4 +1,7 @@
-from crc import Calculator, Configuration
+import binascii
+
+# Each possible byte with its bits in the reverse order, used to reflect the data of the CRC ITU
+_REFLECTED_BYTES = bytes(int(f"{byte:08b}"[::-1], 2) for byte in range(256))
 
 def crc_itu(data_bytes: bytes) -> int:
     """
@@ -10,18 +13,12 @@ def crc_itu(data_bytes: bytes) -> int:
     :rtype: int
     """
 
-    config = Configuration(
-        width=16,
-        polynomial=0x1021,
-        init_value=0xFFFF,
-        final_xor_value=0xFFFF,
-        reverse_input=True,
-        reverse_output=True,
-    )
-
-    calculator = Calculator(config)
-    crc_value = calculator.checksum(data_bytes)
-    return crc_value
+    # CRC-16/X-25: width 16, polynomial 0x1021, init value 0xFFFF, final xor 0xFFFF, reflected input and output
+    # It is the reflected form of the CRC-16/CCITT that binascii.crc_hqx calculates in C (same polynomial and init value),
+    # so the bits of each byte are reflected first (bytes.translate, also in C), then the bits of the result, and it is xored.
+    # This way the whole loop over the packet runs in C, without a python iteration per byte
+    crc = binascii.crc_hqx(bytes(data_bytes).translate(_REFLECTED_BYTES), 0xFFFF)
+    return ((_REFLECTED_BYTES[crc & 0xFF] << 8) | _REFLECTED_BYTES[crc >> 8]) ^ 0xFFFF
 
 def dev_id_to_bcd(dev_id: str) -> bytes:
     """
@@ -34,20 +31,10 @@ def dev_id_to_bcd(dev_id: str) -> bytes:
     """
 
     # Validating the dev_id
-    if len(dev_id) > 15 or len(dev_id) < 15 or not dev_id.isdigit():
+    if len(dev_id) != 15 or not dev_id.isdigit():
         raise ValueError("dev_id must be a 15-digit string.")
     
     # Padding the dev_id with a 0 to the left to complete a 16 digits string.
-    dev_id_padded = "0" + dev_id
-
-    # Using bytearray to use standard array python methods
-    # Like append and others, here we dinamically append bytes to it  
-    bcd_bytes = bytearray()
-    for i in range(0, len(dev_id_padded), 2): # iterating through the dev_id two digits per iteration
-        # packing the two digits of this iteration into one byte
-        byte_val = (int(dev_id_padded[i]) << 4) | int(dev_id_padded[i+1])
-        # appending to the bytes array
-        bcd_bytes.append(byte_val)
-
-    # merging the bytes in the array to a single packet
-    return bytes(bcd_bytes)
+    # Each digit is a nibble, so the 16 digits read as hex are exactly the 8 bytes of the BCD encoding,
+    # and bytes.fromhex packs them without a python loop
+    return bytes.fromhex("0" + dev_id)
@@ -1,3 +1,13 @@
+from functools import lru_cache
+
+# The ids of a device are always the same, so they are normalized only once per device
+# Bounded, so an unexpected amount of devices does not grow the memory indefinitely
+_DEV_ID_CACHE_SIZE = 8192
+
+# Translation table that deletes all the ascii characters that are not digits
+_DELETE_ASCII_NON_DIGITS = str.maketrans("", "", "".join(chr(code) for code in range(128) if not chr(code).isdigit()))
+
+@lru_cache(maxsize=_DEV_ID_CACHE_SIZE)
 def normalize_dev_id(dev_id: str) -> str:
     """
     Normalize devices ids by filtering only the digits of the string and filling it with
@@ -10,9 +20,14 @@ def normalize_dev_id(dev_id: str) -> str:
     """
 
     dev_id = dev_id.zfill(20)
+
+    # The ids are ascii, so the non digits are deleted by str.translate, in a single pass in C
+    if dev_id.isascii():
+        return dev_id.translate(_DELETE_ASCII_NON_DIGITS)
     
     return ''.join(filter(str.isdigit, dev_id))
 
+@lru_cache(maxsize=_DEV_ID_CACHE_SIZE)
 def get_output_dev_id(dev_id: str, output_protocol: str) -> str:
     """
     Get the device ID normalized according to the rules of the output_protocol
@@ -1,15 +1,259 @@
 import socket
+import selectors
+import contextvars
+import sys
 import threading
-import importlib
 import time
+import heapq
+import importlib
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 
 from app.core.logger import get_logger
 from app.config.settings import settings
 from app.src.output.output_mappers import output_mappers
-from app.services.redis_service import get_redis
+from app.services.redis_service import get_redis_str
 
 logger = get_logger(__name__)
-redis_client = get_redis()
+
+# Logger that calls its arguments only if the message is logged
+lazy_logger = logger.opt(lazy=True)
+
+def normalize_output_protocol(output_protocol: str | None) -> str | None:
+    """
+    Normalizes an output protocol name to lower case and interns it,
+    so the same protocol is always the same string object and can be compared by identity.
+
+    :param output_protocol: Output protocol type (e.g., "gt06", "suntech4g")
+    :type output_protocol: str | None
+    :return: The normalized output protocol, or the same value if it is empty
+    :rtype: str | None
+    """
+
+    if not output_protocol:
+        return output_protocol
+
+    return sys.intern(output_protocol.lower())
+
+# The handlers of each output protocol, resolved only once from the output mappers:
+# (login builder, heartbeat builder, info builder, command mapper)
+_PROTOCOL_HANDLERS = {
+    normalize_output_protocol(protocol): (
+        output_mappers.OUTPUT_PACKET_BUILDERS.get(protocol, {}).get("login"),
+        output_mappers.OUTPUT_PACKET_BUILDERS.get(protocol, {}).get("heartbeat"),
+        output_mappers.OUTPUT_PACKET_BUILDERS.get(protocol, {}).get("info"),
+        output_mappers.OUTPUT_COMMAND_MAPPERS.get(protocol),
+    )
+    for protocol in {**output_mappers.OUTPUT_PACKET_BUILDERS, **output_mappers.OUTPUT_COMMAND_MAPPERS}
+}
+_NO_PROTOCOL_HANDLERS = (None, None, None, None)
+
+# The packet builders of each output protocol and packet type, in a single dict
+_PACKET_BUILDERS = {
+    (normalize_output_protocol(protocol), packet_type): packet_builder
+    for protocol, builders in output_mappers.OUTPUT_PACKET_BUILDERS.items()
+    for packet_type, packet_builder in builders.items()
+}
+
+@lru_cache(maxsize=None)
+def _resolve_command_processor(input_source: str):
+    """
+    Imports the command processor of an input source, that receives the commands of the main server.
+    It is resolved only once for each input source, and shared by all of its sessions.
+
+    :param input_source: Input source module name (e.g., "mt02")
+    :type input_source: str
+    :return: The command processor, None if the input source does not process commands
+    """
+
+    module_path = f"app.src.input.{input_source}.builder"
+    try:
+        target_module = importlib.import_module(module_path)
+    except ModuleNotFoundError as e:
+        # Only the missing builder module means the input source does not process commands,
+        # the errors inside an existing one (a missing dependency of it, for example) are raised
+        if e.name != module_path:
+            raise
+
+        logger.warning(f"No command processor module {module_path} for input source {input_source}.")
+        return None
+
+    return getattr(target_module, "process_command", None)
+
+# The addresses of the main server of each output protocol
+_HOST_ADDRESSES = {
+    normalize_output_protocol(protocol): address
+    for protocol, address in settings.OUTPUT_PROTOCOL_HOST_ADRESSES.items()
+}
+
+# This class listens the connections of all the sessions with the main servers in a single thread
+# Using a selector (epoll on linux), it waits until one of the sockets has data to read
+# And hands the socket to its session, so there is no listener thread for each device
+class MainServerListener:
+    def __init__(self):
+        self._selector = selectors.DefaultSelector()
+        self._lock = threading.Lock() # To manage concurrent registrations and the start of the thread
+        self._thread: threading.Thread | None = None
+
+        # Buffer that receives the data of the main servers, allocated once and reused on every read.
+        # Only the listener thread reads into it, and the data is parsed before the next read
+        self._recv_buffer = bytearray(4096)
+
+        # The work that may wait (the commands processing, the disconnections, that wait the lock of the session)
+        # is done in a pool, so the listener thread only reads and parses, and a slow session does not stop the others
+        self._pool = ThreadPoolExecutor(max_workers=settings.OUTPUT_COMMAND_MAX_CONCURRENCY, thread_name_prefix="main-server-command")
+
+    def register(self, sock: socket.socket, session: "MainServerSession"):
+        """
+        Starts listening the socket of a session, starting the listener thread if it is not running yet.
+
+        :param sock: Socket connected to the main server
+        :type sock: socket.socket
+        :param session: Session that owns the socket and processes its data
+        :type session: MainServerSession
+        """
+
+        with self._lock:
+            self._selector.register(sock, selectors.EVENT_READ, session)
+
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._listen, name="main-server-listener", daemon=True)
+                self._thread.start()
+
+    def unregister(self, sock: socket.socket):
+        """
+        Stops listening the socket of a session, it must be called before the socket is closed.
+
+        :param sock: Socket connected to the main server
+        :type sock: socket.socket
+        """
+
+        with self._lock:
+            try:
+                self._selector.unregister(sock)
+            except (KeyError, ValueError): # Not registered, or already closed
+                pass
+
+    def submit(self, func, *args):
+        """
+        Runs a work of a session in the pool of the listener, out of the listener thread.
+        The log context of the caller (the label of the device) goes with it.
+
+        :param func: Function to run
+        :param args: Arguments of the function
+        """
+
+        try:
+            self._pool.submit(contextvars.copy_context().run, self._run_work, func, *args)
+        except Exception as e:
+            logger.error(f"Failed to start the processing of the data of a main server: {e}")
+
+    @staticmethod
+    def _run_work(func, *args):
+        """
+        Runs a work of the pool, logging its errors, because nobody reads the result of the pool.
+
+        :param func: Function to run
+        :param args: Arguments of the function
+        """
+
+        try:
+            func(*args)
+        except Exception as e:
+            logger.opt(exception=e).error(f"Error while processing the data of the main server: {e}")
+
+    def _listen(self):
+        """
+        Waits the sockets to be readable and hands each one to its session, forever.
+        """
+
+        recv_buffer = self._recv_buffer
+        while True:
+            try:
+                events = self._selector.select(timeout=5)
+            except Exception as e:
+                logger.error(f"Error while waiting data from main servers: {e}")
+                continue
+
+            for key, _ in events:
+                key.data._on_readable(key.fileobj, recv_buffer)
+
+# Instanciating the global object "main_server_listener", shared by all sessions
+main_server_listener = MainServerListener()
+
+# This class sends the heartbeats of all the sessions from a single thread
+# It keeps the sessions in a heap ordered by the deadline of their next heartbeat, and waits until the first one
+# Instead of a thread of threading.Timer for each device, created again on every packet sent
+class HeartbeatScheduler:
+    def __init__(self):
+        self._heap = [] # (deadline, sequence, session), the sequence breaks ties without comparing sessions
+        self._sequence = 0
+        self._condition = threading.Condition() # To manage concurrent schedules and wake up the thread for earlier deadlines
+        self._thread: threading.Thread | None = None
+
+        # The heartbeats may need to connect, so they are sent in a pool, not in the thread of the scheduler
+        self._pool = ThreadPoolExecutor(max_workers=settings.OUTPUT_HEARTBEAT_MAX_CONCURRENCY, thread_name_prefix="heartbeat")
+
+    def schedule(self, session: "MainServerSession"):
+        """
+        Schedules the next heartbeat of a session, to the end of the interval since its last send.
+
+        :param session: Session to send the heartbeat
+        :type session: MainServerSession
+        """
+
+        with self._condition:
+            deadline = session._last_send + settings.OUTPUT_HEARTBEAT_INTERVAL_SECONDS
+            self._sequence += 1
+            heapq.heappush(self._heap, (deadline, self._sequence, session))
+
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="heartbeat-scheduler", daemon=True)
+                self._thread.start()
+            elif self._heap[0][2] is session:
+                self._condition.notify() # The new deadline is the first one, the thread must wait less
+
+    def _run(self):
+        """
+        Waits the deadlines of the heartbeats and sends the ones of the sessions that did not send data meanwhile, forever.
+        """
+
+        while True:
+            with self._condition:
+                if not self._heap:
+                    self._condition.wait()
+                    continue
+
+                deadline, _, session = self._heap[0]
+                now = time.monotonic()
+                if deadline > now:
+                    self._condition.wait(deadline - now)
+                    continue
+
+                heapq.heappop(self._heap)
+
+                # Closed sessions are not scheduled anymore
+                if not session._heartbeat_scheduled:
+                    continue
+
+                # The session sent data after this deadline was scheduled, so the heartbeat is postponed
+                next_deadline = session._last_send + settings.OUTPUT_HEARTBEAT_INTERVAL_SECONDS
+                if next_deadline > now:
+                    self._sequence += 1
+                    heapq.heappush(self._heap, (next_deadline, self._sequence, session))
+                    continue
+
+                # The heartbeat schedules the next one when it is sent, like any other data
+                session._heartbeat_scheduled = False
+
+            try:
+                self._pool.submit(session._heartbeat)
+            except Exception as e:
+                logger.error(f"Failed to start heartbeat: {e}")
+
+# Instanciating the global object "heartbeat_scheduler", shared by all sessions
+heartbeat_scheduler = HeartbeatScheduler()
 
 # This class manages the session with the main server
 # It handles connection, disconnection, sending and receiving data
@@ -23,22 +267,41 @@ class MainServerSession:
 
         # Input source module name (e.g., "mt02", "suntech4g")
         self.input_source = input_source
-        self.output_protocol = output_protocol # Output protocol type (e.g., "gt06", "suntech4g")
+        self.output_protocol = normalize_output_protocol(output_protocol) # Output protocol type (e.g., "gt06", "suntech4g")
+
+        # Packet builders and command mapper of the output protocol, resolved once, and again when it changes
+        self._resolve_protocol_handlers()
+
+        # Command processor of the input source, it does not change, so it is resolved only once
+        self._process_command = _resolve_command_processor(input_source)
+
+        # Flag to indicate if the session was closed for good, it is not connected or scheduled again after it
+        self._closed = False
+
+        # HeartBeat schedule
+        # The heartbeat scheduler sends a heartbeat when the interval has passed since the last send.
+        # Later, in _send_data method we reset this schedule, every time the device sends data.
+        self._last_send = time.monotonic() # Monotonic time of the last data sent
+        self._heartbeat_scheduled = False # Flag to indicate if the session is in the heartbeat scheduler
 
-        # HeartBeat Timer
-        # Using threading.Timer because it runs a thread internally that waits until the time has come
-        # And executes the function defined here. Later, in _send_data method we reset this timer. 
-        # Every time the device sends data.
-        self._heartbeat_timer = threading.Timer(30, self._heartbeat) 
-        self._heartbeat_timer.start()
+        # Last voltage of the device read from the state storage and when it expires: (expires_at, voltage)
+        self._voltage_cache = (0.0, None)
+        self._restore_heartbeat_timer()
 
         # Socket for TCP communication with the main server
         self.sock: socket.socket | None = None
-        self.lock = threading.RLock() # To manage concurrent access to the socket and use recursive calls
+        self.lock = threading.Lock() # To manage concurrent access to the socket, the "_locked" methods need it held by the caller
+        self._send_lock = threading.Lock() # To not interleave the packets of concurrent senders in the socket
 
         # State flags
         self._is_gt06_login_step = False # Flag to indicate if in GT06 login step
+        self._gt06_login_answered = threading.Condition(self.lock) # Notified when the GT06 login is answered or the connection closes, for the waiting packets
+        self._gt06_heartbeat_pending = False # Flag to indicate if the heartbeat after the GT06 login was not sent yet
         self._is_connected = False # Flag to indicate if connected to the main server
+
+        # Backoff of the connection attempts, so a main server down is not hammered by every packet
+        self._next_connect_allowed = 0.0 # Monotonic time of the next connection attempt allowed
+        self._reconnect_backoff = settings.OUTPUT_RECONNECT_BACKOFF_SECONDS
     
     def connect(self):
         """
@@ -46,41 +309,81 @@ class MainServerSession:
         """
 
         with self.lock: # Ensure thread-safe access
-            if self._is_connected:
-                return True
+            return self._connect_locked()
 
-            try:
-                if not self.output_protocol:
-                    logger.info(f"It is not possible to start connection to main server, output protocol type is not defined. input_source: {self.input_source}")
-                    return
-                
-                # Get the server address based on the output protocol
-                address = settings.OUTPUT_PROTOCOL_HOST_ADRESSES.get(self.output_protocol)
+    def _connect_locked(self):
+        """
+        Establish connection to the main server, the lock must be held by the caller.
+        """
 
-                if not address:
-                    logger.info(f"Unknown output protocol type: {self.output_protocol}. Cannot connect to main server. input_source: {self.input_source}")
-                    return
+        if self._is_connected:
+            return True
 
-                logger.info(f"Connecting to main server at {address} using protocol {self.output_protocol} input_source: {self.input_source}...")
-                self.sock = socket.create_connection(address, timeout=5)
-                self._is_connected = True
+        # A closed session is not connected again, by a sender that still holds it for example
+        if self._closed:
+            return False
 
-                # Start a thread to listen for incoming data from the main server
-                logger.info(f"Initiating thread to listen for incoming data from main server...")
-                threading.Thread(target=self._listen_to_server, daemon=True).start()
-                
-                # Initiate protocol-specific connection presentation
-                self._present_connection()
+        # Not trying again until the backoff of the last failure has passed
+        if time.monotonic() < self._next_connect_allowed:
+            return False
 
-                logger.info(f"Connection and listener thread established successfully.")
+        try:
+            if not self.output_protocol:
+                logger.info(f"It is not possible to start connection to main server, output protocol type is not defined. input_source: {self.input_source}")
+                return
+            
+            # Get the server address based on the output protocol
+            address = _HOST_ADDRESSES.get(self.output_protocol)
 
-                return True
+            if not address:
+                logger.info(f"Unknown output protocol type: {self.output_protocol}. Cannot connect to main server. input_source: {self.input_source}")
+                return
+
+            # The output protocol may have changed since the last connection
+            self._resolve_protocol_handlers()
+
+            logger.info(f"Connecting to main server at {address} using protocol {self.output_protocol} input_source: {self.input_source}...")
+            # The timeout bounds the connection and every send. The reads never wait on it,
+            # the listener only reads the socket when the selector reports it is readable
+            self.sock = socket.create_connection(address, timeout=settings.OUTPUT_SOCKET_TIMEOUT_SECONDS)
+            self._configure_socket(self.sock)
+            self._is_connected = True # Only after the socket is configured, a failure before it is closed by the except below
+
+            # Start listening for incoming data from the main server, in the shared listener thread
+            logger.info(f"Registering connection to listen for incoming data from main server...")
+            main_server_listener.register(self.sock, self)
             
-            except Exception as e:
-                logger.error(f"Failed to connect to main server: {e}")
-                self._is_connected = False
-                
-                return False
+            # Initiate protocol-specific connection presentation
+            self._present_connection()
+
+            logger.info(f"Connection and listener established successfully.")
+
+            # Connected, so the next failure starts a new backoff
+            self._reconnect_backoff = settings.OUTPUT_RECONNECT_BACKOFF_SECONDS
+
+            return True
+        
+        except Exception as e:
+            logger.error(f"Failed to connect to main server: {e}")
+
+            # Closing the connection if the failure was after connecting, in the login for example
+            self._disconnect_locked()
+            self._is_connected = False
+
+            # The failure may be before the connection was flagged (configuring the socket for example),
+            # so the socket is closed here too, the disconnection only closes the connected ones
+            if self.sock is not None:
+                try:
+                    self.sock.close()
+                except Exception as close_error:
+                    logger.warning(f"Error while closing the failed connection: {close_error}")
+                self.sock = None
+
+            # Waiting the backoff before the next attempt, and doubling it for the next failure
+            self._next_connect_allowed = time.monotonic() + self._reconnect_backoff
+            self._reconnect_backoff = min(self._reconnect_backoff * 2, settings.OUTPUT_RECONNECT_MAX_BACKOFF_SECONDS)
+            
+            return False
     
     def disconnect(self):
         """
@@ -88,25 +391,117 @@ class MainServerSession:
         """
 
         with self.lock:
-            if not self._is_connected:
-                return
+            self._disconnect_locked()
 
-            try:
-                if self.sock:
-                    try:
-                        self.sock.shutdown(socket.SHUT_RDWR) # Shutdown both send and receive
-                    except Exception as e:
-                        logger.warning(f"Error during socket shutdown: {e}")
-                        pass
+    def close(self):
+        """
+        Close the session for good: stop the heartbeat timer and disconnect from the main server.
+        After it, the session does not connect, send or schedule heartbeats anymore.
+        """
 
-                    self.sock.close()
-                    self.sock = None
+        with self.lock:
+            self._closed = True
+            self._heartbeat_scheduled = False # The scheduler drops it on its next deadline
+            self._disconnect_locked()
 
-                self._is_connected = False
-                logger.info(f"Disconnected from main server.")
+    def _disconnect_locked(self):
+        """
+        Disconnect from the main server, the lock must be held by the caller.
+        """
 
-            except Exception as e:
-                logger.error(f"Error while disconnecting from main server: {e}")
+        if not self._is_connected:
+            return
+
+        try:
+            if self.sock:
+                # Stop listening it before closing, so the listener does not wait a closed socket
+                main_server_listener.unregister(self.sock)
+
+                try:
+                    self.sock.shutdown(socket.SHUT_RDWR) # Shutdown both send and receive
+                except Exception as e:
+                    logger.warning(f"Error during socket shutdown: {e}")
+                    pass
+
+                self.sock.close()
+                self.sock = None
+
+            self._is_connected = False
+            self._gt06_login_answered.notify_all() # Waking up the packets waiting the login of this connection
+            logger.info(f"Disconnected from main server.")
+
+        except Exception as e:
+            logger.error(f"Error while disconnecting from main server: {e}")
+
+    @staticmethod
+    def _configure_socket(sock: socket.socket):
+        """
+        Applies the socket options of the settings to a new connection with the main server.
+
+        :param sock: Socket connected to the main server
+        :type sock: socket.socket
+        """
+
+        # Sending the small packets right away, without Nagle delaying them waiting an ACK
+        if settings.OUTPUT_TCP_NODELAY:
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+        # Keepalive probes, so a dead main server is detected even without data being sent
+        keepalive_idle = settings.OUTPUT_TCP_KEEPALIVE_IDLE_SECONDS
+        if keepalive_idle > 0:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+            if hasattr(socket, "TCP_KEEPIDLE"): # Only available in some systems, like linux
+                sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPIDLE, keepalive_idle)
+                sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPINTVL, max(1, keepalive_idle // 6))
+                sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPCNT, 3)
+
+        # Dropping the connection when the sent data is not acknowledged in time, so a dead main server
+        # is detected by the sends too, and not only when the keepalive probes fail
+        user_timeout = settings.OUTPUT_TCP_USER_TIMEOUT_SECONDS
+        if user_timeout > 0 and hasattr(socket, "TCP_USER_TIMEOUT"): # Only available in linux
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_USER_TIMEOUT, user_timeout * 1000)
+
+        # Kernel buffers, only when configured, the defaults are enough for the few small packets of each device
+        if settings.OUTPUT_SOCKET_SEND_BUFFER_SIZE > 0:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, settings.OUTPUT_SOCKET_SEND_BUFFER_SIZE)
+        if settings.OUTPUT_SOCKET_RECEIVE_BUFFER_SIZE > 0:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, settings.OUTPUT_SOCKET_RECEIVE_BUFFER_SIZE)
+
+    def _resolve_protocol_handlers(self):
+        """
+        Resolves the packet builders and the command mapper of the current output protocol,
+        so they are not looked up in the output mappers on every packet.
+        """
+
+        (
+            self._login_builder,
+            self._heartbeat_builder,
+            self._info_builder,
+            self._command_mapper,
+        ) = _PROTOCOL_HANDLERS.get(self.output_protocol, _NO_PROTOCOL_HANDLERS)
+
+        # The GT06 behaviors (login step and voltage before location) are checked on every packet
+        self._is_gt06 = self.output_protocol == "gt06"
+
+        # Last voltage packet built and its voltage, it is the same while the voltage of the device does not change
+        self._voltage_packet_cache = (None, None)
+
+        # The heartbeat packet is always the same for the session, so it is built only once, when first needed
+        self._heartbeat_packet = None
+
+    def _get_heartbeat_packet(self):
+        """
+        Returns the heartbeat packet of the session, built by the first call.
+
+        :return: The heartbeat packet, None if the output protocol has no heartbeat packet builder
+        :rtype: bytes | None
+        """
+
+        heartbeat_packet = self._heartbeat_packet
+        if heartbeat_packet is None and self._heartbeat_builder:
+            heartbeat_packet = self._heartbeat_packet = self._heartbeat_builder(self.device_id)
+
+        return heartbeat_packet
 
     def _present_connection(self):
         """
@@ -115,7 +510,7 @@ class MainServerSession:
         """
         
         # Get the login packet builder for the current output protocol
-        packet_builder = output_mappers.OUTPUT_PACKET_BUILDERS.get(self.output_protocol).get("login")
+        packet_builder = self._login_builder
         if not packet_builder:
             logger.warning(f"No login packet builder defined for protocol {self.output_protocol}. Skipping login step.")
             return
@@ -123,102 +518,164 @@ class MainServerSession:
         if self.output_protocol == "gt06":
             logger.info(f"Initiating GT06 login...")
             self._is_gt06_login_step = True
+            self._gt06_heartbeat_pending = True
 
         elif self.output_protocol == "suntech4g":
             logger.info(f"Sending Suntech4G MNT login packet...")
         
-        # Build and send the login packet
+        # Build and send the login packet, directly in the socket, the lock is already held by the connection
+        # A failure raises to the connection, that closes it
         login_packet = packet_builder(self.device_id, 0)
-        self._send_data(login_packet, self.output_protocol, "login")
+        with self._send_lock:
+            self.sock.sendall(login_packet)
 
         logger.info(f"Login packet sent for protocol {self.output_protocol}.")
+
+        # Reseting the heartbeat timer
+        self._restore_heartbeat_timer()
     
-    def _listen_to_server(self):
+    def _on_readable(self, sock: socket.socket, recv_buffer: bytearray):
         """
-        Listen for incoming data from the main server.
+        Receive and process the incoming data from the main server, called by the listener when the socket is readable.
+
+        :param sock: Socket connected to the main server
+        :type sock: socket.socket
+        :param recv_buffer: Buffer of the listener to receive the data into, valid until the next read
+        :type recv_buffer: bytearray
         """
 
-        while self._is_connected:
+        with logger.contextualize(log_label=self.device_id):
             try:
-                with logger.contextualize(log_label=self.device_id):
-                    if not self.sock:
-                        logger.error(f"Socket is not connected. Cannot listen to server.")
-                        return
-
-                    data = self.sock.recv(4096) # Receive up to 4096 bytes
-                    if not data:
-                        logger.warning(f"Connection to main server lost.")
-                        self.disconnect()
-                        return
-
-                    # If in GT06 login step and data is received, consider login step complete
-                    if self._is_gt06_login_step:
-                        logger.info(f"GT06 login step completed.")
-                        self._is_gt06_login_step = False
-                        continue
-                    
-                    # Else process the incoming data as a command
-                    mapper_func = output_mappers.OUTPUT_COMMAND_MAPPERS.get(self.output_protocol)
-                    if not mapper_func:
-                        logger.warning(f"No command mapper defined for protocol {self.output_protocol}. Cannot process incoming data.")
-                        continue
-                    
-                    # Map the incoming data to a universal command format
-                    universal_command = mapper_func(data)
-                    if not universal_command:
-                        logger.warning(f"Failed to map incoming data to universal command for protocol {self.output_protocol}.")
-                        continue
-                    
-                    # Dynamically import the target input module's command processor
-                    target_module = importlib.import_module(f"app.src.input.{self.input_source}.builder")
-                    builder_func = getattr(target_module, f"process_command", None)
-                    if not builder_func:
-                        logger.warning(f"No command processor defined in module for protocol {self.output_protocol}.")
-                        continue
-                    
-                    # Forward the universal command to the input processor
-                    logger.info(f"Routing command to input processor {self.input_source} for protocol {self.output_protocol}.")
-                    builder_func(self.device_id, universal_command)
-
-            except socket.timeout:
-                continue
+                received = sock.recv_into(recv_buffer) # Receive up to the buffer size
+                if not received:
+                    logger.warning(f"Connection to main server lost.")
+                    self._drop_socket(sock)
+                    return
+
+                # If in GT06 login step and data is received, consider login step complete
+                # The listener does not wait the lock of the session, if other thread holds it, it is done in the pool
+                if self._is_gt06_login_step:
+                    if self.lock.acquire(blocking=False):
+                        try:
+                            self._complete_gt06_login_locked(sock)
+                        finally:
+                            self.lock.release()
+                    else:
+                        main_server_listener.submit(self._complete_gt06_login, sock)
+                    return
+                
+                # Else process the incoming data as a command
+                mapper_func = self._command_mapper
+                if not mapper_func:
+                    logger.warning(f"No command mapper defined for protocol {self.output_protocol}. Cannot process incoming data.")
+                    return
+                
+                # Map the incoming data to a universal command format
+                universal_command = mapper_func(self.device_id, memoryview(recv_buffer)[:received])
+                if not universal_command:
+                    logger.warning(f"Failed to map incoming data to universal command for protocol {self.output_protocol}.")
+                    return
+                
+                # The target input module's command processor, imported when the session was created
+                builder_func = self._process_command
+                if not builder_func:
+                    logger.warning(f"No command processor defined in module for protocol {self.output_protocol}.")
+                    return
+                
+                # Forward the universal command to the input processor, in the pool, so a slow command does not stop the listener
+                logger.info(f"Routing command to input processor {self.input_source} for protocol {self.output_protocol}.")
+                main_server_listener.submit(builder_func, self.device_id, universal_command)
+
+            except (socket.timeout, BlockingIOError):
+                # Readable but no data after all (a spurious wakeup), the listener waits the socket again
+                return
 
             except (ConnectionResetError, BrokenPipeError):
                 logger.warning(f"Connection to main server was reset.")
-                self.disconnect()
-                return
+                self._drop_socket(sock)
             
             except OSError as e:
+                # After a disconnection the socket is closed, so recv fails with a bad file descriptor
+                if self.sock is not sock:
+                    return
+
                 logger.error(f"OS error while listening to server: {e}")
                 if e.errno in [9, 57, 104]:  # Bad file descriptor, Socket is not connected, Connection reset by peer
                     logger.warning(f"Caught Bad file descriptor or connection reset error. Disconnecting...")
                 
-                self.disconnect()
-                return
+                self._drop_socket(sock)
             
             except Exception as e:
                 logger.error(f"Unexpected error while listening to server: {e}")
-                self.disconnect()
-                return
+                self._drop_socket(sock)
+
+    def _complete_gt06_login(self, sock: socket.socket):
+        """
+        Completes the GT06 login step, answered by the main server in the given socket.
+
+        :param sock: Socket that received the answer
+        :type sock: socket.socket
+        """
+
+        with self.lock:
+            self._complete_gt06_login_locked(sock)
+
+    def _complete_gt06_login_locked(self, sock: socket.socket):
+        """
+        Completes the GT06 login step, the lock must be held by the caller.
+        Only for the current connection, the data of an old one does not answer the login of a new one.
+
+        :param sock: Socket that received the answer
+        :type sock: socket.socket
+        """
+
+        if self._is_gt06_login_step and self.sock is sock:
+            logger.info(f"GT06 login step completed.")
+            self._is_gt06_login_step = False
+            self._gt06_login_answered.notify_all() # Waking up the packets waiting the login
+
+    def _drop_socket(self, sock: socket.socket):
+        """
+        Stops listening a failed socket right away, so the listener does not wake up again for it,
+        and disconnects it in the pool, because the disconnection waits the lock of the session.
+
+        :param sock: Socket that failed
+        :type sock: socket.socket
+        """
+
+        main_server_listener.unregister(sock)
+        main_server_listener.submit(self._disconnect_socket, sock)
+
+    def _disconnect_socket(self, sock: socket.socket):
+        """
+        Disconnect from the main server because of an error in a socket used out of the lock,
+        only if it is still the current socket, so the data of an old connection or an old sender does not
+        disconnect a newer connection.
+
+        :param sock: Socket that failed
+        :type sock: socket.socket
+        """
+
+        with self.lock:
+            if self.sock is sock:
+                self._disconnect_locked()
             
     def _restore_heartbeat_timer(self):
         """
         Restores the internal heartbeat timer
         """
 
-        try:
-            # First we cancel the timer
-            self._heartbeat_timer.cancel()
-            
-            # Then we clean the object from the memory
-            self._heartbeat_timer = None
-            
-            # So on, we can create a new object, this "resets" the timer
-            self._heartbeat_timer = threading.Timer(30, self._heartbeat) 
-            self._heartbeat_timer.start()
-        
-        except Exception as e:
-            logger.error(f"There was an error resetting the heartbeat timer: {e}")
+        # Only the time of the last send is updated, the scheduler postpones the heartbeat by itself when its deadline comes,
+        # so no thread or timer is created per packet
+        self._last_send = time.monotonic()
+
+        # A closed session is not scheduled again
+        if self._closed:
+            return
+
+        if not self._heartbeat_scheduled:
+            self._heartbeat_scheduled = True
+            heartbeat_scheduler.schedule(self)
     
     def _heartbeat(self):
         """
@@ -226,25 +683,71 @@ class MainServerSession:
         Used if the device does'nt send data so often.
         """
 
+        # The session was closed after the heartbeat was started by the scheduler
+        if self._closed:
+            return
+
         with logger.contextualize(log_label=self.device_id):
-            # Get the heartbeat packet builder for the current output protocol
-            packet_builder = output_mappers.OUTPUT_PACKET_BUILDERS.get(self.output_protocol, {}).get("heartbeat")
-            if not packet_builder:
+            # Get the heartbeat packet of the current output protocol, built only once for the session
+            heartbeat_packet = self._get_heartbeat_packet()
+            if not heartbeat_packet:
                 logger.error(f"No HeartBeat packet builder defined for {self.output_protocol}.")
                 return
-            
-            # Building the heartbeat packet
-            heartbeat_packet = packet_builder(self.device_id)
 
-            # Sending it
-            self._send_data(heartbeat_packet, self.output_protocol, "heartbeat")
+            # The heartbeats of all sessions share a small pool, so a heartbeat never waits: it does not connect,
+            # does not wait a login, and does not wait a session busy with other thread, that may be stuck on a dead main server
+            if not self.lock.acquire(blocking=False):
+                # Other thread is using the session right now, so the heartbeat is not needed this time
+                self._restore_heartbeat_timer()
+                return True
+
+            try:
+                # A disconnected session is connected again only by the next data, that schedules the heartbeats again
+                if not self._is_connected or not self.sock:
+                    logger.info(f"Not connected to main server, skipping HeartBeat until the next data.")
+                    return
+
+                # The packets waiting the GT06 login send the heartbeat after it
+                if self._is_gt06_login_step:
+                    self._restore_heartbeat_timer()
+                    return True
+
+                self._gt06_heartbeat_pending = False
+                sock = self.sock
+            finally:
+                self.lock.release()
+
+            # Sending it, only if no other thread is sending meanwhile
+            if not self._send_lock.acquire(blocking=False):
+                self._restore_heartbeat_timer()
+                return True
 
-            # Returning a flag to threading.Timer
+            try:
+                # The send lock is released before a disconnection, that takes the lock of the session
+                try:
+                    sock.sendall(heartbeat_packet)
+                finally:
+                    self._send_lock.release()
+            except Exception as e:
+                logger.error(f"Failed to send HeartBeat packet to main server: {e}")
+                self._disconnect_socket(sock)
+                return
+
+            lazy_logger.debug("Sent HeartBeat to main server: {}", heartbeat_packet.hex)
+
+            # Reseting the heartbeat timer
+            self._restore_heartbeat_timer()
+
+            # Returning a flag to the heartbeat scheduler
             return True
     
     def _handle_protocol_specific_behaviors(self, packet_type: str):
         """
         This method was implemented to handle protocol-specific before sending data
+        The lock must be held by the caller.
+
+        :return: The packets to send before the data, None if the data must not be sent anymore
+        :rtype: tuple | None
         """
 
         # Method to get the voltage of the device from his state storage
@@ -254,46 +757,86 @@ class MainServerSession:
             from the device state storage
             """
 
+            # The voltage changes slowly, so it is read from the cache while it does not expire
+            now = time.monotonic()
+            expires_at, voltage = self._voltage_cache
+            if expires_at > now:
+                return voltage
+
             # Here, we can use the instance of a input sessions manager to retrieve this information
             # But for now, lets use the voltage saved on the redis state storage
-            voltage = redis_client.hget(f"device:{self.input_source}:{self.device_id}", "voltage") or 1.11 # Default fallback value
+            voltage = get_redis_str().hget(f"device:{self.input_source}:{self.device_id}", "voltage") or 1.11 # Default fallback value
+            voltage = float(voltage)
+            self._voltage_cache = (now + settings.GT06_VOLTAGE_CACHE_TTL_SECONDS, voltage)
 
             # returning it
-            return float(voltage)
+            return voltage
+
+        # Packets to send before the data
+        previous_packets = ()
 
         # First the behaviors of GT06 output protocol
-        if self.output_protocol == "gt06":
+        if self._is_gt06:
             if self._is_gt06_login_step and packet_type != "login":
                 logger.info(f"Currently in GT06 login step, delaying data send.")
                 
-                while self._is_gt06_login_step:
-                    time.sleep(0.1)
+                # Waiting the listener to signal the answer of the login, the condition releases the lock meanwhile,
+                # so the listener and the other senders are not blocked by this wait.
+                # The state is checked again on every wake up, the connection may have been closed, or replaced
+                # by a new one with its own login step, and each connection has the whole timeout to answer
+                waited_sock = None
+                while self._is_gt06_login_step and self._is_connected:
+                    if self.sock is not waited_sock:
+                        waited_sock = self.sock
+                        deadline = time.monotonic() + settings.GT06_LOGIN_TIMEOUT_SECONDS
+
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        logger.error(f"GT06 login was not answered by the main server. Disconnecting...")
+                        self._disconnect_locked()
+                        return None
+
+                    self._gt06_login_answered.wait(remaining)
+
+                if not self._is_connected:
+                    logger.error(f"Connection to main server was closed while waiting the GT06 login.")
+                    return None
 
                 logger.info(f"GT06 login step completed, proceeding to send heartbeat.")
 
-                # Sending a heartbeat to the cold connection
-                self._heartbeat()
+                # Sending a heartbeat to the cold connection, in its own send, before the data
+                # Only once, by the first of the packets that waited the login
+                heartbeat_packet = self._get_heartbeat_packet() if self._gt06_heartbeat_pending else None
+                if heartbeat_packet:
+                    self._gt06_heartbeat_pending = False
+                    try:
+                        with self._send_lock:
+                            self.sock.sendall(heartbeat_packet)
+                    except Exception as e:
+                        logger.error(f"Failed to send HeartBeat packet to main server: {e}")
+                        self._disconnect_locked()
+                        return None
             
             # For GT06 protocol, send a Voltage packet before location data
             if packet_type == "location":
                 logger.info(f"Sending Voltage packet before location data for GT06 protocol.")
 
                 # First lets get the voltage packet builder from the output protocol
-                voltage_packet_builder = output_mappers.OUTPUT_PACKET_BUILDERS.get(self.output_protocol).get("info")
+                voltage_packet_builder = self._info_builder
                 if voltage_packet_builder:
                     # If there are a voltage packet builder, lets get the device last voltage information
                     voltage = __get_device_voltage()
 
-                    # Now lets build it
-                    voltage_packet = voltage_packet_builder(self.device_id, voltage=voltage, serial_number=0)
-                    try:
-                        # sending the voltage information packet
-                        self.sock.sendall(voltage_packet)
-                        logger.info(f"Sent Voltage packet to main server: {voltage_packet.hex()}")
-                    except Exception as e:
-                        logger.error(f"Failed to send Voltage packet to main server: {e}")
-                        self.disconnect()
-                        return
+                    # Now lets build it, it is sent right before the location data
+                    # The packet only changes with the voltage, so it is built again only when the voltage changes
+                    cached_voltage, voltage_packet = self._voltage_packet_cache
+                    if voltage != cached_voltage or voltage_packet is None:
+                        voltage_packet = voltage_packet_builder(self.device_id, voltage=voltage, serial_number=0)
+                        self._voltage_packet_cache = (voltage, voltage_packet)
+
+                    previous_packets += (voltage_packet,)
+
+        return previous_packets
             
     def _send_data(self, data: bytes, current_output_protocol: str = None, packet_type: str = "location"):
         """
@@ -301,38 +844,67 @@ class MainServerSession:
         
         :param data: Data to send
         :type data: bytes
+        :return: True if the data was sent
+        :rtype: bool | None
         """
 
+        # The session was closed (removed or evicted) while the caller still held it
+        if self._closed:
+            logger.info(f"Cannot send data, the session was closed.")
+            return
+
         with self.lock:
             if not self._is_connected or not self.sock:
-                if not self.connect():
+                if not self._connect_locked():
                     logger.error(f"Cannot send data, not connected to main server.")
                     return
 
             # Check if output protocol has changed
-            if current_output_protocol and current_output_protocol.lower() != self.output_protocol:
+            # The normalized protocols are interned, so the common case (the same protocol) is decided by the identity
+            if current_output_protocol and current_output_protocol is not self.output_protocol \
+                    and normalize_output_protocol(current_output_protocol) != self.output_protocol:
                 logger.warning(f"Output protocol changed from {self.output_protocol} to {current_output_protocol}. Reconnecting...")
                 
-                self.disconnect()
-                self.output_protocol = current_output_protocol
-                if not self.connect():
+                self._disconnect_locked()
+                self.output_protocol = normalize_output_protocol(current_output_protocol)
+                if not self._connect_locked():
                     logger.error(f"Reconnection failed after output protocol change.")
                     return
             
             # Handle protocol-specific behaviors before sending data
-            self._handle_protocol_specific_behaviors(packet_type)
+            # (it may release the lock while waiting the GT06 login, so the socket is read only after it)
+            previous_packets = self._handle_protocol_specific_behaviors(packet_type)
+            if previous_packets is None:
+                return
 
-            # Send the actual data packet
-            try:
-                self.sock.sendall(data)
-                logger.info(f"Sent data to main server: {data.hex()}")
+            # The socket to send to, the lock is held only until here, while the state of the session is read
+            sock = self.sock
+            if not sock:
+                logger.error(f"Cannot send data, connection to main server was closed meanwhile.")
+                return
 
-                # Reseting the heartbeat timer
-                self._restore_heartbeat_timer()
+        # Send the packets out of the lock, so a slow sendall does not block the other threads of the session,
+        # only the other senders, so the packets of different threads are not interleaved in the socket
+        try:
+            # The previous packets and the data go together in a single sendall, so a single send syscall
+            # (and usually a single TCP segment), instead of one for each small packet
+            outgoing = b"".join((*previous_packets, data)) if previous_packets else data
+            with self._send_lock:
+                sock.sendall(outgoing)
 
-            except Exception as e:
-                logger.error(f"Failed to send data to main server: {e}")
-                self.disconnect()
+            # The hex of the packets is made only if the debug level is enabled
+            for previous_packet in previous_packets:
+                lazy_logger.debug("Sent packet to main server: {}", previous_packet.hex)
+            lazy_logger.debug("Sent data to main server: {}", data.hex)
+
+        except Exception as e:
+            logger.error(f"Failed to send data to main server: {e}")
+            self._disconnect_socket(sock)
+            return
+
+        # Reseting the heartbeat timer, it only records the time of this send, so the lock is not needed
+        self._restore_heartbeat_timer()
+        return True
 
 
 class SessionsManager:
@@ -340,9 +912,13 @@ class SessionsManager:
     Manages multiple MainServerSession instances.
     """
 
-    def __init__(self):
-        self.sessions = {}
-        self.lock = threading.RLock() # To manage concurrent access to the sessions dictionary
+    def __init__(self, on_session_removed=None):
+        # The sessions in the order of their last use, the least recently used first
+        self.sessions = OrderedDict()
+        self.lock = threading.Lock() # To manage the creation and removal of sessions, the reads don't need it
+
+        # Called with the device ID when its session is removed or evicted, so the caches of the device are dropped too
+        self.on_session_removed = on_session_removed
 
     def get_session(self, device_id: str, input_source: str, output_protocol: str) -> MainServerSession:
         """
@@ -358,13 +934,33 @@ class SessionsManager:
         :rtype: MainServerSession
         """
 
+        # Reading the dict is atomic, so the existing sessions are returned without the lock
+        session = self.sessions.get(device_id)
+        if session is not None:
+            return session
+
+        evicted_sessions = []
         with self.lock:
-            if device_id not in self.sessions: # Create a new session if it doesn't exist
+            session = self.sessions.get(device_id) # Checking again, another thread may have created it meanwhile
+            if session is None: # Create a new session if it doesn't exist
                 logger.info(f"Creating new session for device ID {device_id}.")
 
-                self.sessions[device_id] = MainServerSession(device_id, input_source, output_protocol)
+                session = self.sessions[device_id] = MainServerSession(device_id, input_source, output_protocol)
+
+                # Removing the least recently used sessions beyond the limit, so the devices that stopped sending
+                # don't keep their connections and timers forever
+                while len(self.sessions) > settings.MAX_OUTPUT_SESSIONS:
+                    evicted_sessions.append(self.sessions.popitem(last=False))
+
+        # Closing them out of the lock, a session may be busy sending
+        for evicted_device_id, evicted_session in evicted_sessions:
+            logger.info(f"Closing least recently used session for device ID {evicted_device_id}.")
+            evicted_session.close()
+
+            if self.on_session_removed:
+                self.on_session_removed(evicted_device_id)
             
-            return self.sessions[device_id]
+        return session
     
     def remove_session(self, device_id: str):
         """
@@ -376,10 +972,15 @@ class SessionsManager:
 
         with self.lock:
             session = self.sessions.pop(device_id, None)
-            if session:
-                session.disconnect()
 
-                logger.info(f"Session for device ID {device_id} removed and disconnected.")
+        # Closing it out of the lock, it may be busy sending
+        if session:
+            session.close()
+
+            logger.info(f"Session for device ID {device_id} removed and disconnected.")
+
+        if self.on_session_removed:
+            self.on_session_removed(device_id)
 
     def exists(self, device_id: str) -> bool:
         """
@@ -391,19 +992,36 @@ class SessionsManager:
         :rtype: bool
         """
 
-        with self.lock:
-            if device_id in self.sessions:
-                socket_obj = self.sessions[device_id].sock # Get the socket object
-                if socket_obj is None:
-                    return False
-                
-                try:
-                    socket_obj.getpeername() # Check if socket is connected
-                    return socket_obj.fileno() != -1 # Check if socket is valid
-                except socket.error:
-                    return False
-                
-            return False
+        # Reading the dict is atomic, so the lock is not needed to find the session
+        # The connected flag of the session is kept by connect and disconnect, so no syscall is needed here
+        session = self.sessions.get(device_id)
+        return session is not None and session._is_connected and session.sock is not None
+
+    def health_check(self, device_id: str) -> bool:
+        """
+        Check if the socket of the session for the given device ID is really connected, asking the system.
+        Unlike "exists", it costs syscalls, so it is meant for low frequency checks.
+        
+        :param device_id: Device identifier
+        :type device_id: str
+        :return: Boolean indicating if the socket of the session is connected
+        :rtype: bool
+        """
+
+        # Reading the dict is atomic, so the lock is not needed to find the session
+        session = self.sessions.get(device_id)
+        if session is not None:
+            socket_obj = session.sock # Get the socket object
+            if socket_obj is None:
+                return False
+            
+            try:
+                socket_obj.getpeername() # Check if socket is connected
+                return socket_obj.fileno() != -1 # Check if socket is valid
+            except socket.error:
+                return False
+            
+        return False
         
     def send_data(self, device_id: str, input_source: str, output_protocol: str, data: bytes, packet_type: str = "location"):
         """
@@ -421,11 +1039,24 @@ class SessionsManager:
         :type packet_type: str
         """
 
-        # Retrieve the session from the manager
-        session = self.get_session(device_id, input_source, output_protocol)
+        # Retrieve the session from the manager, the existing ones directly from the dict
+        session = self.sessions.get(device_id)
+        if session is None:
+            session = self.get_session(device_id, input_source, output_protocol)
+        else:
+            # Marking it as the most recently used
+            try:
+                self.sessions.move_to_end(device_id)
+            except KeyError: # Removed meanwhile, the packet goes in a new session below
+                pass
 
         # Send the data using the session's send method
-        session._send_data(data, current_output_protocol=output_protocol, packet_type=packet_type)
+        if session._send_data(data, output_protocol, packet_type) or not session._closed:
+            return
+
+        # The session was removed or evicted meanwhile, it is never used again, so the data goes in a new session
+        logger.info(f"Session for device ID {device_id} was closed while sending, sending through a new session.")
+        self.get_session(device_id, input_source, output_protocol)._send_data(data, output_protocol, packet_type)
 
 
 class OutputProcessor:
@@ -434,7 +1065,39 @@ class OutputProcessor:
     """
 
     def __init__(self):
-        self.sessions_manager = SessionsManager()
+        # The output protocol of a device is dropped from the cache with its session
+        self.sessions_manager = SessionsManager(on_session_removed=self.forget_output_protocol)
+
+        # Process-local cache of the devices output protocol, in front of redis: device_id -> (expires_at, output_protocol)
+        # The TTL is the same for all entries and they are inserted again when refreshed, so the order of the dict is the order they expire
+        self._output_protocol_cache = {}
+
+    def forget_output_protocol(self, device_id: str):
+        """
+        Drop the cached output protocol of the given device ID, so the next packet reads it from Redis again.
+
+        :param device_id: Device identifier
+        :type device_id: str
+        """
+
+        self._output_protocol_cache.pop(device_id, None)
+
+    def _prune_output_protocol_cache(self, now: float):
+        """
+        Drop the expired output protocols from the cache, and the oldest ones while it is beyond the sessions limit.
+
+        :param now: Current monotonic time
+        :type now: float
+        """
+
+        cache = self._output_protocol_cache
+        for device_id in list(cache): # A copy of the keys, the other threads may change the cache meanwhile
+            if len(cache) <= settings.MAX_OUTPUT_SESSIONS:
+                cached = cache.get(device_id)
+                if cached is not None and cached[0] > now:
+                    break # The next ones expire even later
+
+            cache.pop(device_id, None)
 
     def log_output_packet(self, device_id: str, input_source: str, output_protocol: str, output_packet: bytes, packet_type: str):
         """
@@ -452,13 +1115,22 @@ class OutputProcessor:
         :type packet_type: str
         """
 
+        # The packet and its visual representation are logged in a single record, so the hex is made only once,
+        # and only if the info level is enabled (lazy logger, so every argument is a function)
         if output_protocol == "suntech4g":
-            visual_packet = output_packet.decode("ascii", errors="ignore") # The suntechs binary packets are just text encoded to ASCII table.
-        elif output_protocol == "gt06":
-            visual_packet = output_packet.hex() # GT06 packets are more complex and need to be logged as HEXADECIMAL
-
-        logger.info(f"Prepared {packet_type} packet for device {device_id} using protocol {output_protocol} from input source {input_source}: {output_packet.hex()}")
-        logger.info(f"Visual representation of the packet: {visual_packet}")
+            lazy_logger.info(
+                "Prepared {} packet for device {} using protocol {} from input source {}: {}\nVisual representation of the packet: {}",
+                lambda: packet_type, lambda: device_id, lambda: output_protocol, lambda: input_source,
+                output_packet.hex,
+                lambda: output_packet.decode("ascii", errors="ignore"), # The suntechs binary packets are just text encoded to ASCII table.
+            )
+        else:
+            # GT06 packets are more complex and need to be logged as HEXADECIMAL, so the visual representation is the same hex
+            lazy_logger.info(
+                "Prepared {0} packet for device {1} using protocol {2} from input source {3}: {4}\nVisual representation of the packet: {4}",
+                lambda: packet_type, lambda: device_id, lambda: output_protocol, lambda: input_source,
+                output_packet.hex,
+            )
 
     def check_output_protocol(self, device_id: str) -> str:
         """
@@ -470,8 +1142,14 @@ class OutputProcessor:
         :rtype: str
         """
 
-        # Retrieving the device output protocol from the redis
-        output_protocol = redis_client.hget(f"device:{device_id}", "output_protocol")
+        # Retrieving the device output protocol from the cache, while it does not expire
+        now = time.monotonic()
+        cached = self._output_protocol_cache.get(device_id)
+        if cached is not None and cached[0] > now:
+            return cached[1]
+
+        # Else from the redis
+        output_protocol = get_redis_str().hget(f"device:{device_id}", "output_protocol")
 
         # If it does'nt have one, we attribute a default to it.
         if not output_protocol:
@@ -479,9 +1157,17 @@ class OutputProcessor:
             logger.info(f"No output protocol found in Redis for device {device_id}. Using default: {output_protocol}")
 
             # Setting the output protocol for the next time it passes here
-            redis_client.hset(f"device:{device_id}", "output_protocol", output_protocol)
+            get_redis_str().hset(f"device:{device_id}", "output_protocol", output_protocol)
+
+        # returning the output protocol, normalized, so the sessions compare it by identity, and caching it
+        output_protocol = normalize_output_protocol(output_protocol)
+        self._output_protocol_cache.pop(device_id, None) # Inserted again at the end, keeping the order of expiration
+        self._output_protocol_cache[device_id] = (now + settings.OUTPUT_PROTOCOL_CACHE_TTL_SECONDS, output_protocol)
+
+        # The cache does not grow beyond the sessions limit
+        if len(self._output_protocol_cache) > settings.MAX_OUTPUT_SESSIONS:
+            self._prune_output_protocol_cache(now)
 
-        # returning the output protocol
         return output_protocol
     
     def create_output_packet(self, device_id: str, structured_data: dict, output_protocol: str, packet_type: str = "location") -> bytes:
@@ -490,7 +1176,7 @@ class OutputProcessor:
         
         :param device_id: Device identifier
         :type device_id: str
-        :param data: A structured data dictionary to be converted to bytes
+        :param data: A structured data dictionary (or a dict-like object) to be converted to bytes
         :type data: dict
         :param output_protocol: Output protocol type
         :type output_protocol: str
@@ -502,7 +1188,7 @@ class OutputProcessor:
 
         # Based on the output protocol and the type of packet needed, we chase for the builder function
         # Who will builds the binary packet from the structured python dictionary
-        packet_builder = output_mappers.OUTPUT_PACKET_BUILDERS.get(output_protocol, {}).get(packet_type)
+        packet_builder = _PACKET_BUILDERS.get((output_protocol, packet_type))
         if not packet_builder:
             logger.error(f"No packet builder defined for protocol {output_protocol} and packet type {packet_type}.")
             return b""
@@ -523,7 +1209,7 @@ class OutputProcessor:
         :type input_source: str
         :param output_protocol: Output protocol type
         :type output_protocol: str
-        :param structured_data: A structured data dictionary to be converted to bytes
+        :param structured_data: A structured data dictionary (or a dict-like object) to be converted to bytes
         :type data: dict
         :param packet_type: Type of packet being sent (e.g., "location", "info")
         :type packet_type: str
@@ -1,10 +1,12 @@
 import importlib
+import signal
 import threading
 import dotenv
 dotenv.load_dotenv()
 
 from app.config.settings import settings
 from app.core.logger import get_logger
+from app.src.session.output_session import _resolve_command_processor
 
 logger = get_logger(__name__)
 
@@ -23,6 +25,14 @@ def main():
     # Decode it, structure it, and then forwards towards output layer of the application
     with logger.contextualize(log_label="SERVER"):
 
+        # Resolving the command processors of the input sources (importing their builder modules) before the workers start,
+        # so the first command of the main servers doesn't pay the import, holding the import lock, while the sessions are running
+        for input_source in settings.WORKERS_INPUT_SOURCE:
+            try:
+                _resolve_command_processor(input_source)
+            except Exception as e:
+                logger.opt(exception=e).error(f"There was an error importing the command processor of the input source {input_source}: {e}")
+
         # Get all input source workers, and they location at once
         for input_source, worker_location in settings.WORKERS_INPUT_SOURCE.items():
             module_path = worker_location.get("module_path")
@@ -45,13 +55,20 @@ def main():
             # Initiate the worker with a daemon thread
             threading.Thread(target=target_func, daemon=True).start()
 
-        # Blocking the main thread, so the daemon ones can run freely and undefined    
+        # Blocking the main thread, so the daemon ones can run freely and undefined.
+        # A single event, set only to stop, so the main thread doesn't wake up while waiting
+        shutdown_event = threading.Event()
+
+        # Stopping too when asked by the system (e.g., docker stop), not only by ctrl+c
+        signal.signal(signal.SIGTERM, lambda *_: shutdown_event.set())
+
         try:
-            while True:
-                threading.Event().wait(60) # Wait for not to consume CPU
+            shutdown_event.wait()
 
         except KeyboardInterrupt: # if asked to stop
-            logger.warning("server is being shut down...")
+            pass
+
+        logger.warning("server is being shut down...")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file